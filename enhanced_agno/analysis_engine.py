@@ -4,9 +4,110 @@ Analysis Engine - Generates insights and summaries from data
 This is what makes responses intelligent, not just data dumps
 """
 
-import pandas as pd
 import numpy as np
-from typing import Dict, List, Any, Optional
+from collections import OrderedDict
+from functools import lru_cache
+from operator import itemgetter
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Dict, List, Any, Optional
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# pandas is only needed for summaries and scipy only for significance tests,
+# so both are imported on first use rather than when the module loads
+_stats = None
+
+# Record fields the insights and summaries are computed from
+ANALYZED_FIELDS = ('job_function', 'job_level', 'avg_salary', 'employees', 'positions')
+_MISSING = object()  # Distinguishes an absent field from an explicit None in cache keys
+_get_analyzed_fields = itemgetter(*ANALYZED_FIELDS)
+
+# Templates for generating insights (read-only, shared by every engine instance)
+INSIGHT_TEMPLATES = MappingProxyType({
+    'salary_range': "Salary range spans ${min} to ${max}, a {pct}% difference",
+    'concentration': "Largest concentration at {level} with {count} employees",
+    'comparison': "{func1} pays {pct}% more than {func2}",
+    'growth': "Average salary growth of {pct}% between levels",
+})
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _growth_kernel(salaries):
+        """Compiled version of AnalysisEngine._growth_stats (same return tuple)"""
+        n = salaries.shape[0]
+        growth = np.empty(n - 1)
+        increases = np.empty(n - 1)
+        count = 0
+        for i in range(1, n):
+            prev = salaries[i - 1]
+            if prev > 0:
+                increases[count] = salaries[i] - prev
+                growth[count] = increases[count] / prev * 100
+                count += 1
+        
+        if count == 0:
+            return 0, np.nan, np.nan, 0, np.nan, np.nan, np.nan, np.nan, np.nan
+        
+        # NaN wins max/min like np.argmax/np.min, so results match the NumPy path
+        total = 0.0
+        max_idx = 0
+        min_growth = growth[0]
+        for k in range(count):
+            g = growth[k]
+            total += g
+            if not np.isnan(growth[max_idx]) and (np.isnan(g) or g > growth[max_idx]):
+                max_idx = k
+            if not np.isnan(min_growth) and (np.isnan(g) or g < min_growth):
+                min_growth = g
+        mean = total / count
+        
+        half = count // 2
+        sq_dev = 0.0
+        early = 0.0
+        late = 0.0
+        for k in range(count):
+            g = growth[k]
+            sq_dev += (g - mean) * (g - mean)
+            if k < half:
+                early += g
+            else:
+                late += g
+        
+        early_mean = early / half if count >= 3 else np.nan
+        late_mean = late / (count - half) if count >= 3 else np.nan
+        return (count, mean, growth[max_idx], max_idx, min_growth, np.sqrt(sq_dev / count),
+                early_mean, late_mean, increases[max_idx])
+
+
+def _get_stats():
+    """Import scipy.stats once and reuse the module"""
+    global _stats
+    if _stats is None:
+        import scipy.stats
+        _stats = scipy.stats
+    return _stats
+
+
+# Salaries and headcounts recur across queries (same levels, round thousands),
+# so formatted strings are memoized. typed=True keeps 3 and 3.0 apart for counts.
+@lru_cache(maxsize=1024, typed=True)
+def _fmt_money(value: float) -> str:
+    """Format a dollar amount, e.g. $125,000"""
+    return f"${value:,.0f}"
+
+
+@lru_cache(maxsize=1024, typed=True)
+def _fmt_count(value: int) -> str:
+    """Format a count with thousands separators, e.g. 3,368"""
+    return f"{value:,}"
 
 
 class AnalysisEngine:
@@ -16,8 +117,101 @@ class AnalysisEngine:
     This is the key to better responses - turning data into insights.
     """
     
-    def __init__(self):
-        self.insight_templates = self._load_insight_templates()
+    # Insights are built with inline f-strings; kept for callers that read the templates
+    insight_templates = INSIGHT_TEMPLATES
+    
+    def __init__(self, max_cache_entries: int = 256):
+        """
+        Initialize the engine.
+        
+        Args:
+            max_cache_entries: Maximum number of analyze() results kept in the LRU
+        """
+        self.max_cache_entries = max_cache_entries
+        self._df_cache = None  # (records list, DataFrame) for the result set being analyzed
+        self._analysis_cache: OrderedDict = OrderedDict()  # (query_type, records key) -> (insights, summary)
+    
+    def _ensure_df(self, data: Dict[str, Any]) -> 'pd.DataFrame':
+        """
+        Build the DataFrame for a result set once and reuse it.
+        
+        analyze() runs several insight and summary helpers over the same
+        records; they all share this frame instead of rebuilding it.
+        """
+        records = data.get('data', [])
+        if self._df_cache is not None and self._df_cache[0] is records:
+            return self._df_cache[1]
+        
+        import pandas as pd
+        
+        df = pd.DataFrame.from_records(records)
+        
+        # Smaller dtypes: headcounts fit unsigned ints, labels become integer-coded categories
+        for col in ('employees', 'positions'):
+            if col in df.columns and pd.api.types.is_integer_dtype(df[col]):
+                df[col] = pd.to_numeric(df[col], downcast='unsigned')
+        for col in ('job_function', 'job_level'):
+            if col in df.columns:
+                df[col] = df[col].astype('category')
+        
+        self._df_cache = (records, df)
+        return df
+    
+    @staticmethod
+    def _columnar(records: List[Dict[str, Any]], keys: tuple) -> Dict[str, np.ndarray]:
+        """
+        Extract columns from records as NumPy arrays.
+        
+        Result sets are usually 3-20 rows, where pandas dispatch costs far
+        more than the math itself. Only keys present in some record are
+        returned (like DataFrame columns). Integer columns stay int64,
+        numeric columns with gaps become float64 with NaN, anything else
+        is an object array.
+        """
+        columns = {}
+        for key in keys:
+            # Query results are uniform, so index directly and only fall back for ragged records
+            try:
+                values = [r[key] for r in records]
+            except KeyError:
+                if not any(key in r for r in records):
+                    continue
+                values = [r.get(key) for r in records]
+            
+            if all(isinstance(v, (int, np.integer)) and not isinstance(v, bool) for v in values):
+                columns[key] = np.fromiter(values, dtype=np.int64, count=len(values))
+            elif all(v is None or isinstance(v, (int, float, np.number)) for v in values):
+                columns[key] = np.fromiter(
+                    (np.nan if v is None else v for v in values), dtype=np.float64, count=len(values)
+                )
+            else:
+                columns[key] = np.array(values, dtype=object)
+        
+        return columns
+    
+    @staticmethod
+    def _sorted_quantile(sorted_values: np.ndarray, q: float) -> float:
+        """
+        Linear-interpolation quantile of an already sorted array.
+        
+        Same arithmetic as np.quantile's default method, without re-partitioning.
+        """
+        position = (len(sorted_values) - 1) * q
+        lower = int(position)
+        upper = min(lower + 1, len(sorted_values) - 1)
+        t = position - lower
+        a, b = sorted_values[lower], sorted_values[upper]
+        diff = b - a
+        return b - diff * (1 - t) if t >= 0.5 else a + diff * t
+    
+    @staticmethod
+    def _pearson(x: np.ndarray, y: np.ndarray) -> float:
+        """Pearson correlation over pairwise-complete observations (NaN if undefined)"""
+        mask = ~(np.isnan(x) | np.isnan(y))
+        if mask.sum() < 2:
+            return np.nan
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return float(np.corrcoef(x[mask], y[mask])[0, 1])
     
     def analyze(self, data: Dict[str, Any], query_type: str) -> Dict[str, Any]:
         """
@@ -37,18 +231,67 @@ class AnalysisEngine:
         if data.get('query_type') == 'module':
             return data
         
-        # Generate insights based on query type
-        insights = self.generate_insights(data, query_type)
+        # Already analyzed (e.g. the same result passed through a retry)
+        if 'insights' in data and 'summary' in data:
+            return data
+        
+        # Analysis is deterministic in (records, query_type), so repeated queries are a lookup
+        key = self._analysis_key(data.get('data', []), query_type)
+        cached = self._analysis_cache.get(key) if key is not None else None
         
-        # Generate executive summary
-        summary = self.generate_summary(data, insights, query_type)
+        if cached is not None:
+            self._analysis_cache.move_to_end(key)
+            insights, summary = cached
+        else:
+            # Generate insights based on query type
+            insights = self.generate_insights(data, query_type)
+            
+            # Generate executive summary
+            summary = self.generate_summary(data, insights, query_type)
+            
+            if key is not None:
+                self._analysis_cache[key] = (tuple(insights), summary)
+                if len(self._analysis_cache) > self.max_cache_entries:
+                    self._analysis_cache.popitem(last=False)
         
         # Add to results
-        data['insights'] = insights
+        data['insights'] = list(insights)
         data['summary'] = summary
         
         return data
     
+    def analyze_many(self, items: List[tuple]) -> List[Dict[str, Any]]:
+        """
+        Analyze several query results in one call (e.g. salary, comparison
+        and progression panels of the same dashboard).
+        
+        Results are analyzed in order on this thread: the per-result work is
+        small, GIL-bound Python, and panels repeating a result set reuse the
+        analyze() cache instead of being recomputed.
+        
+        Args:
+            items: (data, query_type) pairs
+            
+        Returns:
+            Analyzed results in the same order as items
+        """
+        return [self.analyze(data, query_type) for data, query_type in items]
+    
+    @staticmethod
+    def _analysis_key(records: List[Dict[str, Any]], query_type: str) -> Optional[tuple]:
+        """Cache key for analyze(), or None if the records can't be hashed"""
+        try:
+            rows = tuple(map(_get_analyzed_fields, records))
+        except KeyError:
+            rows = tuple(tuple(r.get(f, _MISSING) for f in ANALYZED_FIELDS) for r in records)
+        
+        key = (query_type, rows)
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+    
     def generate_insights(self, data: Dict[str, Any], query_type: str) -> List[str]:
         """
         Generate natural language insights from data.
@@ -75,15 +318,23 @@ class AnalysisEngine:
         if not records:
             return insights
         
-        df = pd.DataFrame(records)
+        columns = self._columnar(records, ('avg_salary', 'employees', 'job_level'))
+        row_count = len(records)
+        q1 = q3 = None
         
         # Insight 1: Range analysis with trend
-        if 'avg_salary' in df.columns:
-            salaries = df['avg_salary'].dropna()
+        if 'avg_salary' in columns:
+            salaries = columns['avg_salary']
+            salaries = salaries[~np.isnan(salaries)]
             if len(salaries) > 0:
-                min_sal = salaries.min()
-                max_sal = salaries.max()
-                median_sal = salaries.median()
+                # One sort gives the range, the median and the IQR used for outliers
+                sal_sorted = np.sort(salaries)
+                n = len(sal_sorted)
+                min_sal = sal_sorted[0]
+                max_sal = sal_sorted[-1]
+                median_sal = sal_sorted[n // 2] if n % 2 else (sal_sorted[n // 2 - 1] + sal_sorted[n // 2]) / 2
+                q1 = self._sorted_quantile(sal_sorted, 0.25)
+                q3 = self._sorted_quantile(sal_sorted, 0.75)
                 range_pct = ((max_sal - min_sal) / min_sal * 100) if min_sal > 0 else 0
                 
                 # Determine if distribution is skewed
@@ -94,18 +345,19 @@ class AnalysisEngine:
                     skew_indicator = " (skewed toward higher end)"
                 
                 insights.append(
-                    f"Salary range spans ${min_sal:,.0f} to ${max_sal:,.0f}, "
+                    f"Salary range spans {_fmt_money(min_sal)} to {_fmt_money(max_sal)}, "
                     f"a {range_pct:.0f}% difference across levels{skew_indicator}"
                 )
         
         # Insight 2: Employee distribution with significance
-        if 'employees' in df.columns:
-            total_emp = df['employees'].sum()
+        if 'employees' in columns:
+            employees = columns['employees']
+            total_emp = np.nansum(employees)
             if total_emp > 0:
                 # Find level with most employees
-                max_emp_row = df.loc[df['employees'].idxmax()]
-                level = max_emp_row.get('job_level', 'Unknown')
-                emp_count = max_emp_row['employees']
+                max_idx = int(np.nanargmax(employees))
+                level = columns['job_level'][max_idx] if 'job_level' in columns else 'Unknown'
+                emp_count = employees[max_idx]
                 pct = (emp_count / total_emp * 100)
                 
                 # Check if this is significantly concentrated
@@ -116,14 +368,16 @@ class AnalysisEngine:
                     concentration_note = " - moderately concentrated"
                 
                 insights.append(
-                    f"Largest concentration at {level} with {emp_count:,} employees "
+                    f"Largest concentration at {level} with {_fmt_count(emp_count)} employees "
                     f"({pct:.0f}% of total{concentration_note})"
                 )
         
         # Insight 3: Salary-to-headcount correlation
-        if 'avg_salary' in df.columns and 'employees' in df.columns and len(df) > 2:
+        if 'avg_salary' in columns and 'employees' in columns and row_count > 2:
             # Calculate correlation between salary and employee count
-            correlation = df[['avg_salary', 'employees']].corr().iloc[0, 1]
+            correlation = self._pearson(
+                columns['avg_salary'].astype(np.float64), columns['employees'].astype(np.float64)
+            )
             
             if abs(correlation) > 0.5:
                 direction = "higher" if correlation > 0 else "lower"
@@ -139,14 +393,14 @@ class AnalysisEngine:
                 )
         
         # Insight 4: Identify outliers
-        if 'avg_salary' in df.columns and len(df) > 3:
-            outliers = self.identify_outliers(data)
+        if q1 is not None and row_count > 3:
+            outliers = self._iqr_outliers(columns['avg_salary'], columns.get('job_level'), q1, q3)
             if outliers:
                 outlier = outliers[0]  # Report first outlier
                 outlier_type = "significantly higher" if outlier['type'] == 'high' else "significantly lower"
                 insights.append(
                     f"{outlier['level']} shows {outlier_type} compensation "
-                    f"(${outlier['salary']:,.0f}) compared to other levels"
+                    f"({_fmt_money(outlier['salary'])}) compared to other levels"
                 )
         
         return insights[:4]  # Top 4 insights
@@ -159,82 +413,130 @@ class AnalysisEngine:
         if not records or len(records) < 2:
             return insights
         
-        df = pd.DataFrame(records)
+        present = set().union(*records)
         
         # Group by function if comparing functions
-        if 'job_function' in df.columns and len(df['job_function'].unique()) > 1:
-            functions = df['job_function'].unique()
+        if 'job_function' not in present:
+            return insights
+        
+        functions = list(dict.fromkeys(r.get('job_function') for r in records))
+        if len(functions) < 2:
+            return insights
+        
+        # Single pass over the records: per function, [salary sum, salary count,
+        # employees, positions, rows] plus its salaries. Missing values are skipped like pandas does.
+        agg = {}
+        salaries_by_func = {}
+        employees_missing = False
+        for r in records:
+            func = r.get('job_function')
+            if func is None:
+                continue
+            a = agg.get(func)
+            if a is None:
+                a = agg[func] = [0.0, 0, 0, 0, 0]
+                salaries_by_func[func] = []
+            a[4] += 1
             
-            # Compare average salaries with context
-            if 'avg_salary' in df.columns:
-                func_salaries = df.groupby('job_function')['avg_salary'].mean()
-                
-                if len(func_salaries) >= 2:
-                    highest = func_salaries.idxmax()
-                    lowest = func_salaries.idxmin()
-                    diff = func_salaries[highest] - func_salaries[lowest]
-                    pct_diff = (diff / func_salaries[lowest] * 100) if func_salaries[lowest] > 0 else 0
-                    
-                    # Add context about significance
-                    significance = ""
-                    if pct_diff > 50:
-                        significance = " - substantial premium"
-                    elif pct_diff > 25:
-                        significance = " - notable difference"
-                    elif pct_diff < 10:
-                        significance = " - relatively similar"
-                    
-                    insights.append(
-                        f"{highest} pays {pct_diff:.0f}% more than {lowest} on average "
-                        f"(${func_salaries[highest]:,.0f} vs ${func_salaries[lowest]:,.0f}){significance}"
-                    )
+            salary = r.get('avg_salary')
+            if salary is not None and salary == salary:
+                a[0] += salary
+                a[1] += 1
+                salaries_by_func[func].append(salary)
             
-            # Compare employee counts with ratio
-            if 'employees' in df.columns:
-                func_employees = df.groupby('job_function')['employees'].sum()
-                
-                if len(func_employees) >= 2:
-                    largest = func_employees.idxmax()
-                    smallest = func_employees.idxmin()
-                    ratio = func_employees[largest] / func_employees[smallest] if func_employees[smallest] > 0 else 0
-                    
-                    insights.append(
-                        f"{largest} has {func_employees[largest]:,} employees vs "
-                        f"{func_employees[smallest]:,} in {smallest} ({ratio:.1f}x larger workforce)"
-                    )
+            emp = r.get('employees')
+            if emp is None or emp != emp:
+                employees_missing = True
+            else:
+                a[2] += emp
             
-            # Compare salary ranges
-            if 'avg_salary' in df.columns and 'job_function' in df.columns:
-                for func in functions[:2]:  # Compare first two functions
-                    func_data = df[df['job_function'] == func]['avg_salary']
-                    if len(func_data) > 1:
-                        salary_range = func_data.max() - func_data.min()
-                        range_pct = (salary_range / func_data.min() * 100) if func_data.min() > 0 else 0
-                        
-                        insights.append(
-                            f"{func} shows {range_pct:.0f}% salary range across levels "
-                            f"(${func_data.min():,.0f} to ${func_data.max():,.0f})"
-                        )
+            pos = r.get('positions')
+            if pos is not None and pos == pos:
+                a[3] += pos
+        
+        # Sorted like groupby keys, so ties resolve to the same function
+        groups = sorted(agg)
+        
+        # Compare average salaries with context
+        if 'avg_salary' in present and len(groups) >= 2:
+            salary_funcs = [func for func in groups if agg[func][1]]
             
-            # Compare position diversity
-            if 'positions' in df.columns and 'employees' in df.columns:
-                func_stats = df.groupby('job_function').agg({
-                    'positions': 'sum',
-                    'employees': 'sum'
-                })
+            if salary_funcs:
+                func_salaries = np.array([agg[func][0] / agg[func][1] for func in salary_funcs])
+                hi, lo = int(np.argmax(func_salaries)), int(np.argmin(func_salaries))
+                highest, lowest = salary_funcs[hi], salary_funcs[lo]
+                high_salary, low_salary = func_salaries[hi], func_salaries[lo]
+                diff = high_salary - low_salary
+                pct_diff = (diff / low_salary * 100) if low_salary > 0 else 0
                 
-                if len(func_stats) >= 2:
-                    func_stats['emp_per_pos'] = func_stats['employees'] / func_stats['positions']
-                    
-                    most_diverse = func_stats['emp_per_pos'].idxmin()
-                    least_diverse = func_stats['emp_per_pos'].idxmax()
+                # Add context about significance
+                significance = ""
+                if pct_diff > 50:
+                    significance = " - substantial premium"
+                elif pct_diff > 25:
+                    significance = " - notable difference"
+                elif pct_diff < 10:
+                    significance = " - relatively similar"
+                
+                insights.append(
+                    f"{highest} pays {pct_diff:.0f}% more than {lowest} on average "
+                    f"({_fmt_money(high_salary)} vs {_fmt_money(low_salary)}){significance}"
+                )
+        
+        # Compare employee counts with ratio
+        if 'employees' in present and len(groups) >= 2:
+            # A column with gaps is float in pandas, so keep the same formatting
+            func_employees = np.array(
+                [agg[func][2] for func in groups], dtype=np.float64 if employees_missing else None
+            )
+            
+            hi, lo = int(np.argmax(func_employees)), int(np.argmin(func_employees))
+            largest, smallest = groups[hi], groups[lo]
+            ratio = func_employees[hi] / func_employees[lo] if func_employees[lo] > 0 else 0
+            
+            insights.append(
+                f"{largest} has {_fmt_count(func_employees[hi])} employees vs "
+                f"{_fmt_count(func_employees[lo])} in {smallest} ({ratio:.1f}x larger workforce)"
+            )
+        
+        # Compare salary ranges
+        if 'avg_salary' in present:
+            for func in functions[:2]:  # Compare first two functions
+                func_data = salaries_by_func.get(func)
+                if func_data and agg[func][4] > 1:
+                    func_data = np.asarray(func_data)
+                    func_min = func_data.min()
+                    func_max = func_data.max()
+                    range_pct = ((func_max - func_min) / func_min * 100) if func_min > 0 else 0
                     
                     insights.append(
-                        f"{most_diverse} has more position diversity "
-                        f"({func_stats.loc[most_diverse, 'emp_per_pos']:.0f} emp/position) vs "
-                        f"{least_diverse} ({func_stats.loc[least_diverse, 'emp_per_pos']:.0f} emp/position)"
+                        f"{func} shows {range_pct:.0f}% salary range across levels "
+                        f"({_fmt_money(func_min)} to {_fmt_money(func_max)})"
                     )
         
+        # Compare position diversity
+        if 'positions' in present and 'employees' in present and len(groups) >= 2:
+            ratio_funcs = []
+            ratios = []
+            for func in groups:
+                employees, positions = agg[func][2], agg[func][3]
+                if positions:
+                    ratio_funcs.append(func)
+                    ratios.append(employees / positions)
+                elif employees:
+                    ratio_funcs.append(func)
+                    ratios.append(np.inf)
+            
+            if ratios:
+                emp_per_pos = np.array(ratios)
+                lo, hi = int(np.argmin(emp_per_pos)), int(np.argmax(emp_per_pos))
+                
+                insights.append(
+                    f"{ratio_funcs[lo]} has more position diversity "
+                    f"({emp_per_pos[lo]:.0f} emp/position) vs "
+                    f"{ratio_funcs[hi]} ({emp_per_pos[hi]:.0f} emp/position)"
+                )
+        
         return insights[:4]
     
     def _progression_insights(self, data: Dict[str, Any]) -> List[str]:
@@ -245,25 +547,15 @@ class AnalysisEngine:
         if not records:
             return insights
         
-        df = pd.DataFrame(records)
+        columns = self._columnar(records, ('avg_salary', 'job_level'))
         
-        if 'avg_salary' in df.columns and len(df) > 1:
+        if 'avg_salary' in columns and len(records) > 1:
             # Calculate growth rates
-            salaries = df['avg_salary'].values
-            growth_rates = []
-            absolute_increases = []
-            
-            for i in range(1, len(salaries)):
-                if salaries[i-1] > 0:
-                    growth = ((salaries[i] - salaries[i-1]) / salaries[i-1]) * 100
-                    growth_rates.append(growth)
-                    absolute_increases.append(salaries[i] - salaries[i-1])
+            salaries = np.asarray(columns['avg_salary'], dtype=np.float64)
+            (step_count, avg_growth, max_growth, max_growth_idx, min_growth, growth_std,
+             early_growth, late_growth, abs_increase) = self._growth_stats(salaries)
             
-            if growth_rates:
-                avg_growth = np.mean(growth_rates)
-                max_growth = max(growth_rates)
-                min_growth = min(growth_rates)
-                max_growth_idx = growth_rates.index(max_growth)
+            if step_count > 0:
                 
                 # Overall progression insight
                 total_growth = ((salaries[-1] - salaries[0]) / salaries[0] * 100) if salaries[0] > 0 else 0
@@ -273,18 +565,16 @@ class AnalysisEngine:
                 )
                 
                 # Largest jump insight
-                if 'job_level' in df.columns and max_growth_idx + 1 < len(df):
-                    from_level = df.iloc[max_growth_idx]['job_level']
-                    to_level = df.iloc[max_growth_idx + 1]['job_level']
-                    abs_increase = absolute_increases[max_growth_idx]
+                if 'job_level' in columns and max_growth_idx + 1 < len(records):
+                    from_level = columns['job_level'][max_growth_idx]
+                    to_level = columns['job_level'][max_growth_idx + 1]
                     
                     insights.append(
-                        f"Largest jump ({max_growth:.0f}%, +${abs_increase:,.0f}) occurs from "
+                        f"Largest jump ({max_growth:.0f}%, +{_fmt_money(abs_increase)}) occurs from "
                         f"{from_level} to {to_level}"
                     )
                 
                 # Growth consistency insight
-                growth_std = np.std(growth_rates)
                 if growth_std < 5:
                     insights.append(
                         f"Progression is highly consistent with similar growth at each level "
@@ -297,10 +587,7 @@ class AnalysisEngine:
                     )
                 
                 # Acceleration/deceleration insight
-                if len(growth_rates) >= 3:
-                    early_growth = np.mean(growth_rates[:len(growth_rates)//2])
-                    late_growth = np.mean(growth_rates[len(growth_rates)//2:])
-                    
+                if step_count >= 3:
                     if late_growth > early_growth * 1.2:
                         insights.append(
                             f"Career progression accelerates at higher levels "
@@ -314,6 +601,38 @@ class AnalysisEngine:
         
         return insights[:4]
     
+    @staticmethod
+    def _growth_stats(salaries: np.ndarray) -> tuple:
+        """
+        Level-to-level growth statistics for a salary progression.
+        
+        Steps from a zero/missing salary have no growth rate and are skipped.
+        
+        Returns:
+            (step count, mean growth %, max growth %, index of max step, min growth %,
+             growth std dev, early-half mean, late-half mean, $ increase at max step);
+            the half means are NaN with fewer than 3 steps
+        """
+        if NUMBA_AVAILABLE:
+            return _growth_kernel(salaries)
+        
+        prev = salaries[:-1]
+        valid = prev > 0
+        absolute_increases = np.diff(salaries)[valid]
+        growth_rates = absolute_increases / prev[valid] * 100
+        
+        count = len(growth_rates)
+        if count == 0:
+            return 0, np.nan, np.nan, 0, np.nan, np.nan, np.nan, np.nan, np.nan
+        
+        max_idx = int(np.argmax(growth_rates))
+        half = count // 2
+        early = growth_rates[:half].mean() if count >= 3 else np.nan
+        late = growth_rates[half:].mean() if count >= 3 else np.nan
+        
+        return (count, growth_rates.mean(), growth_rates[max_idx], max_idx, growth_rates.min(),
+                growth_rates.std(), early, late, absolute_increases[max_idx])
+    
     def generate_summary(self, data: Dict[str, Any], insights: List[str], 
                         query_type: str) -> str:
         """
@@ -325,17 +644,21 @@ class AnalysisEngine:
         if not records:
             return "No data available for analysis."
         
-        df = pd.DataFrame(records)
+        df = self._ensure_df(data)
+        
+        # Distinct functions in order of appearance, computed once for every summary type
+        functions = df['job_function'].unique() if 'job_function' in df.columns else None
         
         # Build contextual summary based on query type
         if query_type == 'compare' or query_type == 'comparison':
-            return self._generate_comparison_summary(df, insights)
+            return self._generate_comparison_summary(df, insights, functions)
         elif query_type == 'progression':
-            return self._generate_progression_summary(df, insights)
+            return self._generate_progression_summary(df, insights, functions)
         else:
-            return self._generate_standard_summary(df, insights)
+            return self._generate_standard_summary(df, insights, functions)
     
-    def _generate_standard_summary(self, df: pd.DataFrame, insights: List[str]) -> str:
+    def _generate_standard_summary(self, df: 'pd.DataFrame', insights: List[str],
+                                   functions: Optional[Any] = None) -> str:
         """Generate summary for standard salary queries"""
         summary_parts = []
         
@@ -346,14 +669,14 @@ class AnalysisEngine:
             max_salary = df['avg_salary'].max()
             
             summary_parts.append(
-                f"Average compensation: ${avg_salary:,.0f} "
-                f"(range: ${min_salary:,.0f} - ${max_salary:,.0f})"
+                f"Average compensation: {_fmt_money(avg_salary)} "
+                f"(range: {_fmt_money(min_salary)} - {_fmt_money(max_salary)})"
             )
         
         # Workforce metrics
         if 'employees' in df.columns:
             total_emp = df['employees'].sum()
-            summary_parts.append(f"Total workforce: {total_emp:,} employees")
+            summary_parts.append(f"Total workforce: {_fmt_count(total_emp)} employees")
         
         # Position diversity
         if 'positions' in df.columns:
@@ -367,49 +690,47 @@ class AnalysisEngine:
                 summary_parts.append(f"{total_pos} distinct positions")
         
         # Add function/level context if available
-        if 'job_function' in df.columns:
-            functions = df['job_function'].unique()
-            if len(functions) == 1:
-                summary_parts.insert(0, f"Function: {functions[0]}")
+        if functions is not None and len(functions) == 1:
+            summary_parts.insert(0, f"Function: {functions[0]}")
         
         return " | ".join(summary_parts)
     
-    def _generate_comparison_summary(self, df: pd.DataFrame, insights: List[str]) -> str:
+    def _generate_comparison_summary(self, df: 'pd.DataFrame', insights: List[str],
+                                     functions: Optional[Any] = None) -> str:
         """Generate summary for comparison queries"""
         summary_parts = []
         
-        if 'job_function' in df.columns and len(df['job_function'].unique()) > 1:
-            functions = df['job_function'].unique()
+        if functions is not None and len(functions) > 1:
             summary_parts.append(f"Comparing: {' vs '.join(functions)}")
             
             # Salary comparison
             if 'avg_salary' in df.columns:
-                func_salaries = df.groupby('job_function')['avg_salary'].mean()
-                highest = func_salaries.idxmax()
-                lowest = func_salaries.idxmin()
-                diff_pct = ((func_salaries[highest] - func_salaries[lowest]) / func_salaries[lowest] * 100)
+                func_salaries = df.groupby('job_function', observed=True)['avg_salary'].mean()
+                values = func_salaries.to_numpy()
+                hi, lo = int(np.nanargmax(values)), int(np.nanargmin(values))
+                highest, lowest = func_salaries.index[hi], func_salaries.index[lo]
+                diff_pct = ((values[hi] - values[lo]) / values[lo] * 100)
                 
                 summary_parts.append(
                     f"{highest} leads by {diff_pct:.0f}% "
-                    f"(${func_salaries[highest]:,.0f} vs ${func_salaries[lowest]:,.0f})"
+                    f"({_fmt_money(values[hi])} vs {_fmt_money(values[lo])})"
                 )
             
             # Headcount comparison
             if 'employees' in df.columns:
-                func_employees = df.groupby('job_function')['employees'].sum()
+                func_employees = df.groupby('job_function', observed=True)['employees'].sum()
                 total_emp = func_employees.sum()
-                summary_parts.append(f"Total: {total_emp:,} employees across both functions")
+                summary_parts.append(f"Total: {_fmt_count(total_emp)} employees across both functions")
         
         return " | ".join(summary_parts)
     
-    def _generate_progression_summary(self, df: pd.DataFrame, insights: List[str]) -> str:
+    def _generate_progression_summary(self, df: 'pd.DataFrame', insights: List[str],
+                                      functions: Optional[Any] = None) -> str:
         """Generate summary for progression queries"""
         summary_parts = []
         
-        if 'job_function' in df.columns:
-            functions = df['job_function'].unique()
-            if len(functions) == 1:
-                summary_parts.append(f"Career Path: {functions[0]}")
+        if functions is not None and len(functions) == 1:
+            summary_parts.append(f"Career Path: {functions[0]}")
         
         if 'avg_salary' in df.columns and len(df) > 1:
             entry_salary = df['avg_salary'].iloc[0]
@@ -417,81 +738,83 @@ class AnalysisEngine:
             total_growth = ((top_salary - entry_salary) / entry_salary * 100) if entry_salary > 0 else 0
             
             summary_parts.append(
-                f"Entry to top: ${entry_salary:,.0f} → ${top_salary:,.0f} "
+                f"Entry to top: {_fmt_money(entry_salary)} → {_fmt_money(top_salary)} "
                 f"({total_growth:.0f}% growth)"
             )
         
         if 'job_level' in df.columns:
-            levels = len(df['job_level'].unique())
+            # Categorical column: distinct levels are its categories, plus one if any are missing
+            levels = len(df['job_level'].cat.categories) + int(df['job_level'].hasnans)
             summary_parts.append(f"{levels} career levels")
         
         return " | ".join(summary_parts)
     
-    def _load_insight_templates(self) -> Dict[str, List[str]]:
-        """Load templates for generating insights"""
-        return {
-            'salary_range': "Salary range spans ${min} to ${max}, a {pct}% difference",
-            'concentration': "Largest concentration at {level} with {count} employees",
-            'comparison': "{func1} pays {pct}% more than {func2}",
-            'growth': "Average salary growth of {pct}% between levels",
-        }
-    
     def identify_outliers(self, data: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Identify statistical outliers in the data"""
         records = data.get('data', [])
         if not records:
             return []
         
-        df = pd.DataFrame(records)
+        columns = self._columnar(records, ('avg_salary', 'job_level'))
         outliers = []
         
-        if 'avg_salary' in df.columns and len(df) > 3:
-            salaries = df['avg_salary']
-            q1 = salaries.quantile(0.25)
-            q3 = salaries.quantile(0.75)
-            iqr = q3 - q1
+        if 'avg_salary' in columns and len(records) > 3:
+            salaries = columns['avg_salary']
+            valid = salaries[~np.isnan(salaries)]
+            if len(valid) == 0:
+                return []
             
-            lower_bound = q1 - 1.5 * iqr
-            upper_bound = q3 + 1.5 * iqr
-            
-            outlier_rows = df[(salaries < lower_bound) | (salaries > upper_bound)]
-            
-            for _, row in outlier_rows.iterrows():
-                outliers.append({
-                    'level': row.get('job_level', 'Unknown'),
-                    'salary': row.get('avg_salary', 0),
-                    'type': 'high' if row['avg_salary'] > upper_bound else 'low'
-                })
+            q1, q3 = np.quantile(valid, [0.25, 0.75])
+            outliers = self._iqr_outliers(salaries, columns.get('job_level'), q1, q3)
         
         return outliers
     
+    @staticmethod
+    def _iqr_outliers(salaries: np.ndarray, levels: Optional[np.ndarray],
+                      q1: float, q3: float) -> List[Dict[str, Any]]:
+        """Rows outside the 1.5 * IQR fences, given precomputed quartiles"""
+        iqr = q3 - q1
+        lower_bound = q1 - 1.5 * iqr
+        upper_bound = q3 + 1.5 * iqr
+        
+        mask = (salaries < lower_bound) | (salaries > upper_bound)
+        if not mask.any():
+            return []
+        
+        outlier_salaries = salaries[mask]
+        outlier_levels = levels[mask] if levels is not None else ['Unknown'] * len(outlier_salaries)
+        
+        return [
+            {'level': level, 'salary': salary, 'type': 'high' if high else 'low'}
+            for level, salary, high in zip(outlier_levels, outlier_salaries, outlier_salaries > upper_bound)
+        ]
+    
     def calculate_significance(self, data1: Dict[str, Any], data2: Dict[str, Any]) -> Dict[str, Any]:
         """
         Calculate statistical significance between two datasets.
-        Uses t-test to determine if differences are statistically significant.
+        Uses Welch's t-test (no equal-variance assumption) to determine if
+        differences are statistically significant.
         """
-        from scipy import stats
-        
         records1 = data1.get('data', [])
         records2 = data2.get('data', [])
         
         if not records1 or not records2:
             return {'significant': False, 'reason': 'Insufficient data'}
         
-        df1 = pd.DataFrame(records1)
-        df2 = pd.DataFrame(records2)
+        columns1 = self._columnar(records1, ('avg_salary',))
+        columns2 = self._columnar(records2, ('avg_salary',))
         
-        if 'avg_salary' not in df1.columns or 'avg_salary' not in df2.columns:
+        if 'avg_salary' not in columns1 or 'avg_salary' not in columns2:
             return {'significant': False, 'reason': 'Missing salary data'}
         
-        salaries1 = df1['avg_salary'].dropna()
-        salaries2 = df2['avg_salary'].dropna()
+        salaries1 = columns1['avg_salary'][~np.isnan(columns1['avg_salary'])]
+        salaries2 = columns2['avg_salary'][~np.isnan(columns2['avg_salary'])]
         
         if len(salaries1) < 2 or len(salaries2) < 2:
             return {'significant': False, 'reason': 'Too few data points'}
         
-        # Perform t-test
-        t_stat, p_value = stats.ttest_ind(salaries1, salaries2)
+        # Perform Welch's t-test
+        t_stat, p_value = _get_stats().ttest_ind(salaries1, salaries2, equal_var=False)
         
         return {
             'significant': p_value < 0.05,
@@ -506,24 +829,27 @@ class AnalysisEngine:
         if not records:
             return {}
         
-        df = pd.DataFrame(records)
+        columns = self._columnar(records, ('avg_salary',))
         
-        if 'avg_salary' not in df.columns:
+        if 'avg_salary' not in columns:
             return {}
         
-        salaries = df['avg_salary'].dropna()
+        salaries = columns['avg_salary']
+        salaries = salaries[~np.isnan(salaries)]
         
         if len(salaries) == 0:
             return {}
         
+        p10, p25, p50, p75, p90 = np.quantile(salaries, [0.10, 0.25, 0.50, 0.75, 0.90])
+        
         return {
-            'p10': salaries.quantile(0.10),
-            'p25': salaries.quantile(0.25),
-            'p50': salaries.quantile(0.50),
-            'p75': salaries.quantile(0.75),
-            'p90': salaries.quantile(0.90),
+            'p10': p10,
+            'p25': p25,
+            'p50': p50,
+            'p75': p75,
+            'p90': p90,
             'mean': salaries.mean(),
-            'std': salaries.std()
+            'std': salaries.std(ddof=1) if len(salaries) > 1 else np.nan
         }
     
     def calculate_correlation(self, data: Dict[str, Any], var1: str, var2: str) -> Dict[str, Any]:
@@ -532,18 +858,19 @@ class AnalysisEngine:
         if not records:
             return {'correlation': 0, 'strength': 'none'}
         
-        df = pd.DataFrame(records)
+        columns = self._columnar(records, (var1, var2))
         
-        if var1 not in df.columns or var2 not in df.columns:
+        if var1 not in columns or var2 not in columns:
             return {'correlation': 0, 'strength': 'none'}
         
-        # Drop NaN values
-        clean_df = df[[var1, var2]].dropna()
+        x = columns[var1].astype(np.float64)
+        y = columns[var2].astype(np.float64)
         
-        if len(clean_df) < 3:
+        # Drop NaN values
+        if np.count_nonzero(~(np.isnan(x) | np.isnan(y))) < 3:
             return {'correlation': 0, 'strength': 'insufficient data'}
         
-        correlation = clean_df[var1].corr(clean_df[var2])
+        correlation = self._pearson(x, y)
         
         # Determine strength
         abs_corr = abs(correlation)
@@ -5,8 +5,40 @@ Comparison Engine - Advanced comparison and benchmarking capabilities
 
 import pandas as pd
 import numpy as np
+from operator import itemgetter
 from typing import Dict, List, Any, Optional, Tuple
 
+# Record fields used by comparisons, split by how they are stored as arrays
+NUMERIC_FIELDS = ('avg_salary', 'employees', 'positions')
+LABEL_FIELDS = ('job_function', 'job_level')
+
+# Market position tiers: _MARKET_LABELS[i] covers percentiles in [_MARKET_BINS[i-1], _MARKET_BINS[i])
+_MARKET_BINS = np.array([25, 50, 75, 90])
+_MARKET_LABELS = (
+    "Bottom tier (below 25th percentile)",
+    "Below market (25th-50th percentile)",
+    "Market rate (50th-75th percentile)",
+    "Above market (75th-90th percentile)",
+    "Top tier (90th+ percentile)",
+)
+
+# format_comparison sections, each filled with one format_map call
+_COMPARISON_HEADER = "\n{rule}\nCOMPARISON: {f1} vs {f2}\n{rule}\n"
+_SALARY_SECTION = (
+    "\nAverage Salary:\n"
+    "  {f1}: ${avg1:,.0f}\n"
+    "  {f2}: ${avg2:,.0f}\n"
+    "  Difference: ${diff:,.0f} ({pct:.1f}%)\n"
+    "  Higher: {higher}\n"
+)
+_WORKFORCE_SECTION = (
+    "\nWorkforce Size:\n"
+    "  {f1}: {emp1:,} employees\n"
+    "  {f2}: {emp2:,} employees\n"
+    "  Ratio: {ratio:.2f}x\n"
+    "  Larger: {larger}\n"
+)
+
 
 class ComparisonEngine:
     """
@@ -20,7 +52,92 @@ class ComparisonEngine:
     """
     
     def __init__(self):
-        pass
+        self._frame_cache = None  # (records list, DataFrame) of the last benchmarked result set
+    
+    def _prepare(self, data: Dict[str, Any]) -> pd.DataFrame:
+        """
+        Build the benchmarking DataFrame for a result set once and reuse it.
+        
+        job_function and job_level become categoricals, so the function
+        filter compares integer codes instead of strings row by row.
+        """
+        records = data.get('data', [])
+        if self._frame_cache is not None and self._frame_cache[0] is records:
+            return self._frame_cache[1]
+        
+        df = pd.DataFrame(records)
+        for col in LABEL_FIELDS:
+            if col in df.columns:
+                df[col] = df[col].astype('category')
+        
+        self._frame_cache = (records, df)
+        return df
+    
+    @staticmethod
+    def _columnarize(records: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+        """
+        Split records into one NumPy array per field in a single pass.
+        
+        Comparison inputs are a handful of rows, where building a DataFrame
+        costs far more than the reductions themselves. Only fields present
+        in some record are returned (like DataFrame columns). Integer
+        columns stay int64, numeric columns with gaps become float64 with
+        NaN, labels are object arrays.
+        """
+        present = set().union(*records)
+        fields = {key: [] for key in NUMERIC_FIELDS + LABEL_FIELDS if key in present}
+        for r in records:
+            for key, values in fields.items():
+                values.append(r.get(key))
+        
+        columns = {}
+        for key, values in fields.items():
+            if key in LABEL_FIELDS:
+                columns[key] = np.array(values, dtype=object)
+            elif all(isinstance(v, (int, np.integer)) and not isinstance(v, bool) for v in values):
+                columns[key] = np.array(values, dtype=np.int64)
+            elif all(v is None or isinstance(v, (int, float, np.number)) for v in values):
+                columns[key] = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+            else:
+                columns[key] = np.array(values, dtype=object)
+        
+        return columns
+    
+    @staticmethod
+    def _valid(values: np.ndarray) -> np.ndarray:
+        """Drop missing values (NaN) from a numeric column"""
+        if values.dtype.kind == 'f':
+            return values[~np.isnan(values)]
+        return values
+    
+    def _summarize(self, columns: Dict[str, np.ndarray]) -> Dict[str, Any]:
+        """
+        Every statistic compare_functions needs from one side, computed once.
+        
+        Keys are only present when the underlying column is.
+        """
+        summary = {}
+        
+        if 'avg_salary' in columns:
+            salaries = self._valid(columns['avg_salary'])
+            if salaries.size:
+                summary['avg_mean'] = salaries.mean()
+                summary['avg_min'] = salaries.min()
+                summary['avg_max'] = salaries.max()
+            else:
+                summary['avg_mean'] = summary['avg_min'] = summary['avg_max'] = np.nan
+        
+        if 'employees' in columns:
+            summary['emp_sum'] = self._valid(columns['employees']).sum()
+        
+        if 'positions' in columns:
+            summary['pos_sum'] = self._valid(columns['positions']).sum()
+        
+        if 'job_level' in columns:
+            # Distinct levels in order of first appearance (hash-based, done in C)
+            summary['levels'] = pd.unique(columns['job_level']).tolist()
+        
+        return summary
     
     def compare_functions(self, data1: Dict[str, Any], data2: Dict[str, Any], 
                          function1: str, function2: str, specific_level: str = None) -> Dict[str, Any]:
@@ -43,18 +160,18 @@ class ComparisonEngine:
         if not records1 or not records2:
             return {'status': 'error', 'message': 'Insufficient data for comparison'}
         
-        df1 = pd.DataFrame(records1)
-        df2 = pd.DataFrame(records2)
+        cols1 = self._columnarize(records1)
+        cols2 = self._columnarize(records2)
         
         # If specific level requested, filter to that level
-        if specific_level and 'job_level' in df1.columns and 'job_level' in df2.columns:
-            df1_level = df1[df1['job_level'] == specific_level]
-            df2_level = df2[df2['job_level'] == specific_level]
+        if specific_level and 'job_level' in cols1 and 'job_level' in cols2:
+            mask1 = cols1['job_level'] == specific_level
+            mask2 = cols2['job_level'] == specific_level
             
-            if not df1_level.empty and not df2_level.empty:
+            if mask1.any() and mask2.any():
                 # Use level-specific data for comparison
-                df1 = df1_level
-                df2 = df2_level
+                cols1 = {key: values[mask1] for key, values in cols1.items()}
+                cols2 = {key: values[mask2] for key, values in cols2.items()}
         
         comparison = {
             'function1': function1,
@@ -63,10 +180,13 @@ class ComparisonEngine:
             'metrics': {}
         }
         
+        stats1 = self._summarize(cols1)
+        stats2 = self._summarize(cols2)
+        
         # Compare average salaries
-        if 'avg_salary' in df1.columns and 'avg_salary' in df2.columns:
-            avg1 = df1['avg_salary'].mean()
-            avg2 = df2['avg_salary'].mean()
+        if 'avg_mean' in stats1 and 'avg_mean' in stats2:
+            avg1 = stats1['avg_mean']
+            avg2 = stats2['avg_mean']
             diff = avg1 - avg2
             pct_diff = (diff / avg2 * 100) if avg2 > 0 else 0
             
@@ -77,30 +197,29 @@ class ComparisonEngine:
                 'percent_difference': pct_diff,
                 'higher': function1 if avg1 > avg2 else function2
             }
-        
-        # Compare salary ranges
-        if 'avg_salary' in df1.columns and 'avg_salary' in df2.columns:
-            range1 = df1['avg_salary'].max() - df1['avg_salary'].min()
-            range2 = df2['avg_salary'].max() - df2['avg_salary'].min()
+            
+            # Compare salary ranges
+            range1 = stats1['avg_max'] - stats1['avg_min']
+            range2 = stats2['avg_max'] - stats2['avg_min']
             
             comparison['metrics']['salary_range'] = {
                 function1: {
-                    'min': df1['avg_salary'].min(),
-                    'max': df1['avg_salary'].max(),
+                    'min': stats1['avg_min'],
+                    'max': stats1['avg_max'],
                     'range': range1
                 },
                 function2: {
-                    'min': df2['avg_salary'].min(),
-                    'max': df2['avg_salary'].max(),
+                    'min': stats2['avg_min'],
+                    'max': stats2['avg_max'],
                     'range': range2
                 },
                 'wider_range': function1 if range1 > range2 else function2
             }
         
         # Compare employee counts
-        if 'employees' in df1.columns and 'employees' in df2.columns:
-            total1 = df1['employees'].sum()
-            total2 = df2['employees'].sum()
+        if 'emp_sum' in stats1 and 'emp_sum' in stats2:
+            total1 = stats1['emp_sum']
+            total2 = stats2['emp_sum']
             
             comparison['metrics']['workforce'] = {
                 function1: total1,
@@ -111,9 +230,9 @@ class ComparisonEngine:
             }
         
         # Compare position counts
-        if 'positions' in df1.columns and 'positions' in df2.columns:
-            pos1 = df1['positions'].sum()
-            pos2 = df2['positions'].sum()
+        if 'pos_sum' in stats1 and 'pos_sum' in stats2:
+            pos1 = stats1['pos_sum']
+            pos2 = stats2['pos_sum']
             
             comparison['metrics']['positions'] = {
                 function1: pos1,
@@ -123,16 +242,17 @@ class ComparisonEngine:
             }
         
         # Compare level distribution
-        if 'job_level' in df1.columns and 'job_level' in df2.columns:
-            levels1 = set(df1['job_level'].unique())
-            levels2 = set(df2['job_level'].unique())
+        if 'levels' in stats1 and 'levels' in stats2:
+            levels1 = stats1['levels']
+            levels2 = stats2['levels']
+            set1, set2 = set(levels1), set(levels2)
             
             comparison['metrics']['levels'] = {
-                function1: list(levels1),
-                function2: list(levels2),
-                'common_levels': list(levels1 & levels2),
-                'unique_to_' + function1: list(levels1 - levels2),
-                'unique_to_' + function2: list(levels2 - levels1)
+                function1: levels1,
+                function2: levels2,
+                'common_levels': [level for level in levels1 if level in set2],
+                'unique_to_' + function1: [level for level in levels1 if level not in set2],
+                'unique_to_' + function2: [level for level in levels2 if level not in set1]
             }
         
         comparison['status'] = 'success'
@@ -153,39 +273,44 @@ class ComparisonEngine:
         if not records:
             return {'status': 'error', 'message': 'No data available'}
         
-        df = pd.DataFrame(records)
-        
-        # Filter to specific level
-        if 'job_level' not in df.columns:
+        # Filter to specific level on the raw records, so error paths build no arrays
+        if not any('job_level' in r for r in records):
             return {'status': 'error', 'message': 'Level information not available'}
         
-        level_df = df[df['job_level'] == level]
+        # Like the DataFrame comparison, None matches no row (not rows lacking a level)
+        level_rows = [] if level is None else [i for i, r in enumerate(records) if r.get('job_level') == level]
         
-        if level_df.empty:
+        if not level_rows:
             return {'status': 'error', 'message': f'No data for level: {level}'}
         
+        # Fields and dtypes come from all records (like the full DataFrame's columns),
+        # so a field missing at this level is NaN rather than absent
+        columns = self._columnarize(records)
+        
         comparison = {
             'level': level,
             'functions': {}
         }
         
         # Compare each function at this level
-        if 'job_function' in level_df.columns:
-            for function in level_df['job_function'].unique():
-                func_data = level_df[level_df['job_function'] == function]
+        if 'job_function' in columns:
+            functions = columns['job_function']
+            for i in level_rows:
+                function = functions[i]
+                # First row per function wins; rows without a function are skipped
+                if function is None or function != function or function in comparison['functions']:
+                    continue
                 
-                if not func_data.empty:
-                    comparison['functions'][function] = {
-                        'avg_salary': func_data['avg_salary'].iloc[0] if 'avg_salary' in func_data.columns else None,
-                        'employees': func_data['employees'].iloc[0] if 'employees' in func_data.columns else None,
-                        'positions': func_data['positions'].iloc[0] if 'positions' in func_data.columns else None
-                    }
+                comparison['functions'][function] = {
+                    field: columns[field][i] if field in columns else None
+                    for field in NUMERIC_FIELDS
+                }
         
         # Calculate rankings
         if comparison['functions']:
             salaries = {f: d['avg_salary'] for f, d in comparison['functions'].items() if d['avg_salary']}
             if salaries:
-                sorted_funcs = sorted(salaries.items(), key=lambda x: x[1], reverse=True)
+                sorted_funcs = sorted(salaries.items(), key=itemgetter(1), reverse=True)
                 comparison['salary_ranking'] = [f for f, _ in sorted_funcs]
                 comparison['highest_paid'] = sorted_funcs[0][0]
                 comparison['lowest_paid'] = sorted_funcs[-1][0]
@@ -209,7 +334,7 @@ class ComparisonEngine:
         if not records:
             return {'status': 'error', 'message': 'No data available'}
         
-        df = pd.DataFrame(records)
+        df = self._prepare(data)
         
         if 'avg_salary' not in df.columns:
             return {'status': 'error', 'message': 'Salary data not available'}
@@ -217,28 +342,22 @@ class ComparisonEngine:
         benchmarks = {}
         
         # Overall market benchmarks
-        salaries = df['avg_salary'].dropna()
-        
-        benchmarks['market'] = {
-            'p10': salaries.quantile(0.10),
-            'p25': salaries.quantile(0.25),
-            'p50': salaries.quantile(0.50),
-            'p75': salaries.quantile(0.75),
-            'p90': salaries.quantile(0.90),
-            'mean': salaries.mean(),
-            'std': salaries.std()
-        }
+        benchmarks['market'], sorted_salaries = self._market_benchmarks(df)
         
         # Function-specific benchmarks
         if target_function and 'job_function' in df.columns:
-            func_df = df[df['job_function'] == target_function]
+            func_mask = (df['job_function'] == target_function).to_numpy()
             
-            if not func_df.empty and 'avg_salary' in func_df.columns:
-                func_salaries = func_df['avg_salary'].dropna()
-                func_avg = func_salaries.mean()
+            if func_mask.any():
+                # Select straight from the float column; no filtered frame or Series
+                func_arr = df['avg_salary'].to_numpy(dtype=np.float64, na_value=np.nan)[func_mask]
+                func_arr = func_arr[~np.isnan(func_arr)]
+                func_avg = func_arr.mean() if func_arr.size else np.nan
                 
-                # Calculate percentile in overall market
-                percentile = (salaries < func_avg).sum() / len(salaries) * 100
+                # Calculate percentile in overall market: the left insertion point
+                # is the count of salaries strictly below func_avg (none are below NaN)
+                below = np.searchsorted(sorted_salaries, func_avg, side='left') if not np.isnan(func_avg) else np.intp(0)
+                percentile = below / len(sorted_salaries) * 100
                 
                 benchmarks[target_function] = {
                     'average': func_avg,
@@ -251,6 +370,87 @@ class ComparisonEngine:
         benchmarks['status'] = 'success'
         return benchmarks
     
+    def calculate_benchmarks_all(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Benchmark every function in the data against the overall market.
+        
+        Equivalent to calling calculate_benchmarks once per function, but the
+        market is summarized once, all function averages come from one
+        groupby and all percentiles from one searchsorted.
+        
+        Args:
+            data: Salary data
+            
+        Returns:
+            Market benchmarks plus a 'functions' dict keyed by function name
+        """
+        records = data.get('data', [])
+        if not records:
+            return {'status': 'error', 'message': 'No data available'}
+        
+        df = self._prepare(data)
+        
+        if 'avg_salary' not in df.columns:
+            return {'status': 'error', 'message': 'Salary data not available'}
+        
+        market, sorted_salaries = self._market_benchmarks(df)
+        benchmarks = {'market': market, 'functions': {}}
+        
+        if 'job_function' in df.columns:
+            func_means = df.groupby('job_function', observed=True, sort=False)['avg_salary'].mean()
+            averages = func_means.to_numpy(dtype=np.float64)
+            
+            # Salaries strictly below each average; NaN averages rank at 0 like a single benchmark
+            missing = np.isnan(averages)
+            below = np.searchsorted(sorted_salaries, np.where(missing, -np.inf, averages), side='left')
+            if sorted_salaries.size:
+                percentiles = below / sorted_salaries.size * 100
+            else:
+                percentiles = np.full(len(averages), np.nan)
+            tiers = np.where(np.isnan(percentiles), 0, np.searchsorted(_MARKET_BINS, percentiles, side='right'))
+            
+            for function, func_avg, percentile, tier in zip(func_means.index, averages, percentiles, tiers):
+                benchmarks['functions'][function] = {
+                    'average': func_avg,
+                    'market_percentile': percentile,
+                    'vs_market_mean': func_avg - market['mean'],
+                    'vs_market_median': func_avg - market['p50'],
+                    'positioning': _MARKET_LABELS[tier]
+                }
+        
+        benchmarks['status'] = 'success'
+        return benchmarks
+    
+    def _market_benchmarks(self, df: pd.DataFrame) -> Tuple[Dict[str, float], np.ndarray]:
+        """
+        Overall market percentiles, mean and std of avg_salary.
+        
+        Returns:
+            (market benchmarks, sorted non-missing salaries for percentile ranking)
+        """
+        salaries = df['avg_salary'].to_numpy(dtype=np.float64, na_value=np.nan)
+        salaries = salaries[~np.isnan(salaries)]
+        
+        # Sorted once: read all five ranks from it here, and function ranks by the caller
+        sorted_salaries = np.sort(salaries)
+        
+        if salaries.size:
+            p10, p25, p50, p75, p90 = np.percentile(sorted_salaries, [10, 25, 50, 75, 90])
+        else:
+            p10 = p25 = p50 = p75 = p90 = np.nan
+        
+        market = {
+            'p10': p10,
+            'p25': p25,
+            'p50': p50,
+            'p75': p75,
+            'p90': p90,
+            'mean': salaries.mean() if salaries.size else np.nan,
+            'std': salaries.std(ddof=1) if salaries.size > 1 else np.nan
+        }
+        
+        return market, sorted_salaries
+    
     def analyze_variable_pay(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Analyze variable pay components.
@@ -295,48 +495,49 @@ class ComparisonEngine:
     
     def _get_market_position(self, percentile: float) -> str:
         """Determine market position from percentile"""
-        if percentile >= 90:
-            return "Top tier (90th+ percentile)"
-        elif percentile >= 75:
-            return "Above market (75th-90th percentile)"
-        elif percentile >= 50:
-            return "Market rate (50th-75th percentile)"
-        elif percentile >= 25:
-            return "Below market (25th-50th percentile)"
-        else:
-            return "Bottom tier (below 25th percentile)"
+        if np.isnan(percentile):
+            return _MARKET_LABELS[0]
+        return _MARKET_LABELS[int(np.searchsorted(_MARKET_BINS, percentile, side='right'))]
     
     def format_comparison(self, comparison: Dict[str, Any]) -> str:
         """Format comparison results for display"""
         if comparison.get('status') != 'success':
             return f"Comparison failed: {comparison.get('message', 'Unknown error')}"
         
-        output = []
-        output.append(f"\n{'='*70}")
-        output.append(f"COMPARISON: {comparison.get('function1', 'A')} vs {comparison.get('function2', 'B')}")
-        output.append(f"{'='*70}\n")
+        output = _COMPARISON_HEADER.format_map({
+            'rule': '=' * 70,
+            'f1': comparison.get('function1', 'A'),
+            'f2': comparison.get('function2', 'B')
+        })
         
         metrics = comparison.get('metrics', {})
         
         # Salary comparison
         if 'average_salary' in metrics:
             sal = metrics['average_salary']
-            output.append("Average Salary:")
-            output.append(f"  {comparison['function1']}: ${sal[comparison['function1']]:,.0f}")
-            output.append(f"  {comparison['function2']}: ${sal[comparison['function2']]:,.0f}")
-            output.append(f"  Difference: ${abs(sal['difference']):,.0f} ({abs(sal['percent_difference']):.1f}%)")
-            output.append(f"  Higher: {sal['higher']}\n")
+            output += _SALARY_SECTION.format_map({
+                'f1': comparison['function1'],
+                'f2': comparison['function2'],
+                'avg1': sal[comparison['function1']],
+                'avg2': sal[comparison['function2']],
+                'diff': abs(sal['difference']),
+                'pct': abs(sal['percent_difference']),
+                'higher': sal['higher']
+            })
         
         # Workforce comparison
         if 'workforce' in metrics:
             wf = metrics['workforce']
-            output.append("Workforce Size:")
-            output.append(f"  {comparison['function1']}: {wf[comparison['function1']]:,} employees")
-            output.append(f"  {comparison['function2']}: {wf[comparison['function2']]:,} employees")
-            output.append(f"  Ratio: {wf['ratio']:.2f}x")
-            output.append(f"  Larger: {wf['larger']}\n")
-        
-        return '\n'.join(output)
+            output += _WORKFORCE_SECTION.format_map({
+                'f1': comparison['function1'],
+                'f2': comparison['function2'],
+                'emp1': wf[comparison['function1']],
+                'emp2': wf[comparison['function2']],
+                'ratio': wf['ratio'],
+                'larger': wf['larger']
+            })
+        
+        return output
 
 
 if __name__ == "__main__":
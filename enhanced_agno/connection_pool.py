@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Connection Pool - Reusable SQLite connections for the agent's queries
+Avoids paying file-open, journal setup and schema parsing on every question
+"""
+
+import queue
+import sqlite3
+from contextlib import contextmanager
+from typing import Iterator
+
+MMAP_SIZE = 256 * 1024 * 1024  # Read pages straight from a 256MB mapping of the database file
+
+
+class ConnectionPool:
+    """Fixed-size pool of pre-configured SQLite connections"""
+
+    def __init__(self, db_path: str = 'compensation_data.db', size: int = 4, read_only: bool = True):
+        """
+        Initialize the pool and open all connections up front.
+
+        Args:
+            db_path: Path to the SQLite database
+            size: Number of pooled connections
+            read_only: Whether to reject writes on pooled connections (PRAGMA query_only)
+        """
+        self.db_path = db_path
+        self.size = size
+        self.read_only = read_only
+        # LIFO so the most recently used (warmest) connection is handed out next
+        self._pool: queue.LifoQueue = queue.LifoQueue(maxsize=size)
+
+        for _ in range(size):
+            self._pool.put(self._create_connection())
+
+    def _create_connection(self) -> sqlite3.Connection:
+        """Open a connection and apply the performance pragmas"""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=30000")
+        conn.execute("PRAGMA cache_size=-20000")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+        if self.read_only:
+            conn.execute("PRAGMA query_only=1")
+        return conn
+
+    @contextmanager
+    def connection(self, timeout: float = 30) -> Iterator[sqlite3.Connection]:
+        """
+        Borrow a connection for the duration of a with-block.
+
+        Args:
+            timeout: Seconds to wait for a free connection
+
+        Yields:
+            A pooled SQLite connection
+        """
+        conn = self._pool.get(timeout=timeout)
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def close(self):
+        """Close every idle connection in the pool"""
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
@@ -3,52 +3,112 @@
 Conversation Manager - Tracks context and history
 """
 
-from typing import Dict, List, Any, Optional
+from typing import Deque, Dict, List, Any, Optional
+from collections import deque
 from datetime import datetime
-from dataclasses import dataclass, asdict
 import json
+import re
+
+# Words that refer back to earlier results ("compare them to sales"), matched as whole words
+_REF_RE = re.compile(r'\b(?:them|that|those|it|these)\b', re.IGNORECASE)
 
 
-@dataclass
 class Interaction:
     """Represents a single Q&A interaction"""
-    timestamp: str
-    question: str
-    entities: Dict[str, Any]
-    results: Dict[str, Any]
-    response: str
+    
+    # Slots instead of a per-instance __dict__: long histories hold many of these
+    __slots__ = ('timestamp', 'question', 'entities', 'results', 'response')
+    
+    def __init__(self, timestamp: str, question: str, entities: Dict[str, Any],
+                 results: Dict[str, Any], response: str):
+        self.timestamp = timestamp
+        self.question = question
+        self.entities = entities
+        self.results = results
+        self.response = response
+    
+    def __repr__(self) -> str:
+        return f"Interaction(timestamp={self.timestamp!r}, question={self.question!r})"
     
     def to_dict(self) -> Dict[str, Any]:
-        return asdict(self)
+        """
+        Plain dict view of the interaction.
+        
+        entities and results are returned as stored (not deep-copied like
+        dataclasses.asdict did), so callers should treat them as read-only.
+        """
+        return {
+            'timestamp': self.timestamp,
+            'question': self.question,
+            'entities': self.entities,
+            'results': self.results,
+            'response': self.response
+        }
 
 
 class ConversationManager:
     """Manages conversation history and context with session support"""
     
-    def __init__(self):
-        # Session-based storage: {session_id: {history: [], context: {}}}
+    def __init__(self, max_history: int = 200, archive_path: Optional[str] = None):
+        """
+        Initialize the conversation manager.
+        
+        Args:
+            max_history: Interactions kept in memory per session; older ones are evicted
+            archive_path: Optional JSON Lines file that evicted interactions are appended to
+        """
+        self.max_history = max_history
+        self.archive_path = archive_path
+        
+        # Session-based storage: {session_id: {history: deque, context: {}}}
         self.sessions: Dict[str, Dict[str, Any]] = {}
         self.current_session_id: Optional[str] = None
         
-        # Legacy support - default session
-        self.history: List[Interaction] = []
-        self.context: Dict[str, Any] = {}
+        # Legacy support - default session used when no session is active
+        # (kept out of self.sessions so it never shows up in list_sessions)
+        self._default: Dict[str, Any] = self._new_session()
+    
+    def _new_session(self) -> Dict[str, Any]:
+        """Empty session storage with a bounded history"""
+        return {
+            'history': deque(maxlen=self.max_history),
+            'context': {},
+            'created_at': datetime.now().isoformat()
+        }
+    
+    @property
+    def _active(self) -> Dict[str, Any]:
+        """Storage of the active session, or the default session"""
+        return self.sessions.get(self.current_session_id, self._default)
+    
+    def _storage(self, session_id: str = None) -> Dict[str, Any]:
+        """Storage of the given session if it exists, else of the active session"""
+        if session_id:
+            session = self.sessions.get(session_id)
+            if session is not None:
+                return session
+        return self._active
+    
+    @property
+    def history(self) -> Deque[Interaction]:
+        """History of the active session (each interaction is stored once)"""
+        return self._active['history']
+    
+    @property
+    def context(self) -> Dict[str, Any]:
+        """Context of the active session"""
+        return self._active['context']
     
     def create_session(self, session_id: str = None) -> str:
         """Create a new session and return its ID"""
         if session_id is None:
-            from datetime import datetime
             import random
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             random_suffix = random.randint(10000, 99999)
             session_id = f"hr_session_{timestamp}_{random_suffix}"
         
         if session_id not in self.sessions:
-            self.sessions[session_id] = {
-                'history': [],
-                'context': {},
-                'created_at': datetime.now().isoformat()
-            }
+            self.sessions[session_id] = self._new_session()
         
         self.current_session_id = session_id
         return session_id
@@ -64,26 +124,26 @@ class ConversationManager:
     
     def get_session_history(self, session_id: str) -> List[Dict[str, Any]]:
         """Get history for a specific session"""
-        if session_id in self.sessions:
-            return [i.to_dict() for i in self.sessions[session_id]['history']]
-        return []
+        session = self.sessions.get(session_id)
+        if session is None:
+            return []
+        return [i.to_dict() for i in session['history']]
     
     def get_session_context(self, session_id: str) -> Dict[str, Any]:
         """Get context for a specific session"""
-        if session_id in self.sessions:
-            return self.sessions[session_id]['context']
-        return {}
+        session = self.sessions.get(session_id)
+        return session['context'] if session is not None else {}
     
     def list_sessions(self) -> List[Dict[str, Any]]:
         """List all sessions with metadata"""
-        sessions = []
-        for session_id, data in self.sessions.items():
-            sessions.append({
+        return [
+            {
                 'session_id': session_id,
                 'created_at': data.get('created_at'),
                 'message_count': len(data['history'])
-            })
-        return sessions
+            }
+            for session_id, data in self.sessions.items()
+        ]
     
     def add_interaction(self, question: str, entities: Dict[str, Any], 
                        results: Dict[str, Any], response: str, session_id: str = None):
@@ -96,25 +156,35 @@ class ConversationManager:
             response=response
         )
         
-        # Add to session-specific history if session is active
-        if session_id or self.current_session_id:
-            sid = session_id or self.current_session_id
-            if sid not in self.sessions:
+        # Add to session-specific history if session is active, else the default session
+        sid = session_id or self.current_session_id
+        if sid:
+            session = self.sessions.get(sid)
+            if session is None:
                 self.create_session(sid)
-            self.sessions[sid]['history'].append(interaction)
-            self._update_context(interaction, sid)
+                session = self.sessions[sid]
+        else:
+            session = self._default
         
-        # Also add to legacy history for backward compatibility
-        self.history.append(interaction)
-        self._update_context(interaction)
+        history = session['history']
+        if self.archive_path and len(history) == history.maxlen:
+            # The oldest interaction is about to fall out of the window
+            self._archive(history[0], sid)
+        history.append(interaction)
+        
+        self._update_context(interaction, sid)
+    
+    def _archive(self, interaction: Interaction, session_id: str = None):
+        """Append an evicted interaction to the archive file as one JSON line"""
+        record = interaction.to_dict()
+        record['session_id'] = session_id
+        with open(self.archive_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, separators=(',', ':'), default=str) + '\n')
     
     def _update_context(self, interaction: Interaction, session_id: str = None):
         """Update context based on latest interaction"""
         # Determine which context to update
-        if session_id and session_id in self.sessions:
-            context = self.sessions[session_id]['context']
-        else:
-            context = self.context
+        context = self._storage(session_id)['context']
         
         # Track last mentioned entities
         if interaction.entities.get('functions'):
@@ -127,27 +197,20 @@ class ConversationManager:
     
     def get_recent_history(self, n: int = 3) -> List[Dict[str, Any]]:
         """Get n most recent interactions"""
-        return [i.to_dict() for i in self.history[-n:]]
+        history = self.history
+        return [history[i].to_dict() for i in range(-min(n, len(history)), 0)]
     
     def resolve_reference(self, text: str, session_id: str = None) -> Optional[Dict[str, Any]]:
         """
         Resolve references like 'them', 'that', 'those'
         Returns context that the reference likely refers to
         """
-        text_lower = text.lower()
-        
         # Check for reference words
-        reference_words = ['them', 'that', 'those', 'it', 'these']
-        has_reference = any(word in text_lower for word in reference_words)
-        
-        if not has_reference:
+        if not _REF_RE.search(text):
             return None
         
         # Get context from session or default
-        if session_id and session_id in self.sessions:
-            context = self.sessions[session_id]['context']
-        else:
-            context = self.context
+        context = self._storage(session_id)['context']
         
         # Return last mentioned entities
         return {
@@ -159,22 +222,20 @@ class ConversationManager:
     def get_context_summary(self, session_id: str = None) -> str:
         """Get a summary of current context for LLM"""
         # Get history from session or default
-        if session_id and session_id in self.sessions:
-            history = self.sessions[session_id]['history']
-        else:
-            history = self.history
+        history = self._storage(session_id)['history']
         
         if not history:
             return "No previous conversation."
         
-        recent = history[-3:]
-        summary = "Recent conversation:\n"
+        recent = [history[i] for i in range(-min(3, len(history)), 0)]
+        parts = ["Recent conversation:\n"]
         for i, interaction in enumerate(recent, 1):
-            summary += f"{i}. Q: {interaction.question}\n"
-            if interaction.entities.get('functions'):
-                summary += f"   Functions: {', '.join(interaction.entities['functions'])}\n"
+            parts.append(f"{i}. Q: {interaction.question}\n")
+            functions = interaction.entities.get('functions')
+            if functions:
+                parts.append(f"   Functions: {', '.join(functions)}\n")
         
-        return summary
+        return ''.join(parts)
     
     def clear(self):
         """Clear history and context"""
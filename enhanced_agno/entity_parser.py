@@ -4,105 +4,418 @@ Entity Parser - Fast, deterministic entity extraction
 No LLM needed for simple parsing
 """
 
+import os
 import re
 import sqlite3
-from typing import Dict, Optional, List, Any
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, List, Any, Iterable, Iterator, Sequence, Tuple
 from difflib import get_close_matches
+from types import MappingProxyType
+from urllib.request import pathname2url
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+try:
+    import hyperscan
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
+
+try:
+    from rapidfuzz import fuzz, process
+    RAPIDFUZZ_AVAILABLE = True
+except ImportError:
+    RAPIDFUZZ_AVAILABLE = False
+
+# Without pyahocorasick or hyperscan, vocabularies at least this large are matched with
+# a prefix trie walk; below it one C-level str.find per phrase is faster
+_TRIE_MIN_PHRASES = 128
+
+SUGGESTION_CUTOFF = 0.6  # Minimum difflib similarity ratio for a suggestion
+
+MMAP_SIZE = 128 * 1024 * 1024  # Map up to 128MB of the database file
+
+MAX_CACHED_QUESTION_LEN = 512  # Longer questions (pasted documents) are parsed but not cached
+
+# Vocabulary queries; sqlite3 keeps the prepared statements in the connection's
+# statement cache, so reloads on the parser's connection skip re-parsing them
+_DB_FUNCTIONS_SQL = "SELECT DISTINCT job_function FROM job_positions ORDER BY job_function"
+_DB_MODULES_SQL = "SELECT DISTINCT job_module FROM job_positions WHERE job_module IS NOT NULL ORDER BY job_module"
+
+# Phrases that should be matched as aliases before the database names
+# ("Business Operations" must not match just "Operations")
+PHRASE_ALIASES = MappingProxyType({
+    'business operations': 'Corporate & Business Services',
+    'business services': 'Corporate & Business Services',
+    'corporate services': 'Corporate & Business Services',
+})
+
+# Short fallback keywords that only count as whole words ("hr" must not match "three")
+_WHOLE_WORD_KEYWORDS = frozenset({'hr', 'ops'})
+
+
+def _is_whole_word(text: str, start: int, end: int) -> bool:
+    """Whether text[start:end] has no word character on either side, like \\b...\\b"""
+    if start and (text[start - 1].isalnum() or text[start - 1] == '_'):
+        return False
+    return end == len(text) or not (text[end].isalnum() or text[end] == '_')
+
+
+# Spread phrasings in priority order: "spread 20", then "20% spread", then
+# "20 percent spread" ("spread: 20 percent" is caught by the first). Anchored at the
+# start, each branch lazily skips to that phrasing's leftmost occurrence, so one
+# match() call returns what searching the phrasings one after another would.
+_SPREAD_RE = re.compile(
+    r'^(?:.*?spread[:\s]+(?P<after>\d+)'
+    r'|.*?(?P<pct>\d+)%\s+spread'
+    r'|.*?(?P<percent>\d+)\s*percent\s+spread)',
+    re.IGNORECASE | re.DOTALL
+)
+
+# "compare X and Y", "X vs Y", "X versus Y"
+_COMPARISON_PATTERNS = (
+    re.compile(r'compare\s+([^and]+?)\s+and\s+([^in]+?)(?:\s+in|\s+tell|\s+for|$)', re.IGNORECASE),
+    re.compile(r'([^vs]+?)\s+vs\.?\s+([^in]+?)(?:\s+in|\s+tell|\s+for|$)', re.IGNORECASE),
+    re.compile(r'([^versus]+?)\s+versus\s+([^in]+?)(?:\s+in|\s+tell|\s+for|$)', re.IGNORECASE),
+)
+
+# Articles stripped from titles pulled out of comparison patterns
+_ARTICLE_RE = re.compile(r'\b(?:the|a|an)\b', re.IGNORECASE)
+
+
+class _PhraseMatcher:
+    """
+    Finds every occurrence of a fixed set of phrases in one scan.
+    
+    Uses an Aho-Corasick automaton when pyahocorasick is installed, else a
+    Hyperscan literal database (ASCII text only, since Hyperscan reports
+    byte offsets). Otherwise large vocabularies are walked through a
+    dict-of-dicts prefix trie from each text position and small ones use
+    one str.find loop per phrase. All of them report every (overlapping)
+    substring occurrence, like repeated `in` tests.
+    """
+    
+    def __init__(self, phrases: Iterable[Tuple[str, Any]]):
+        """
+        Args:
+            phrases: (phrase, payload) pairs; a phrase may carry several payloads
+        """
+        self._phrases: Dict[str, List[Any]] = {}
+        for phrase, payload in phrases:
+            if phrase:
+                self._phrases.setdefault(phrase, []).append(payload)
+        
+        self._automaton = None
+        self._hs_db = None
+        self._trie = None
+        if AHOCORASICK_AVAILABLE and self._phrases:
+            self._automaton = ahocorasick.Automaton()
+            for phrase, payloads in self._phrases.items():
+                self._automaton.add_word(phrase, (len(phrase), payloads))
+            self._automaton.make_automaton()
+            return
+        
+        if HYPERSCAN_AVAILABLE and self._phrases:
+            # Expression ids index _hs_payloads; SOM_LEFTMOST reports start offsets too
+            self._hs_payloads = list(self._phrases.values())
+            self._hs_db = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+            self._hs_db.compile(
+                expressions=[phrase.encode() for phrase in self._phrases],
+                ids=list(range(len(self._hs_payloads))),
+                elements=len(self._hs_payloads),
+                flags=[hyperscan.HS_FLAG_SOM_LEFTMOST] * len(self._hs_payloads),
+                literal=True
+            )
+            self._hs_local = threading.local()  # Scratch space can't be shared between threads
+        
+        if len(self._phrases) >= _TRIE_MIN_PHRASES:
+            # Each node maps the next character to a child; the None key marks a phrase end
+            self._trie = {}
+            for phrase, payloads in self._phrases.items():
+                node = self._trie
+                for char in phrase:
+                    node = node.setdefault(char, {})
+                node[None] = payloads
+    
+    def iter(self, text: str) -> Iterator[Tuple[int, int, Any]]:
+        """Yield (start, end, payload) for every phrase occurrence in text"""
+        if self._automaton is not None:
+            for last, (length, payloads) in self._automaton.iter(text):
+                for payload in payloads:
+                    yield last + 1 - length, last + 1, payload
+            return
+        
+        if self._hs_db is not None and text.isascii():
+            scratch = getattr(self._hs_local, 'scratch', None)
+            if scratch is None:
+                scratch = self._hs_local.scratch = hyperscan.Scratch(self._hs_db)
+            
+            matches = []
+            self._hs_db.scan(
+                text.encode('ascii'),
+                match_event_handler=lambda expr_id, start, end, flags, context: matches.append((start, end, expr_id)),
+                scratch=scratch
+            )
+            for start, end, expr_id in matches:
+                for payload in self._hs_payloads[expr_id]:
+                    yield start, end, payload
+            return
+        
+        if self._trie is not None:
+            trie = self._trie
+            length = len(text)
+            for start in range(length):
+                node = trie.get(text[start])
+                end = start + 1
+                while node is not None:
+                    if None in node:
+                        for payload in node[None]:
+                            yield start, end, payload
+                    if end == length:
+                        break
+                    node = node.get(text[end])
+                    end += 1
+            return
+        
+        for phrase, payloads in self._phrases.items():
+            start = text.find(phrase)
+            while start != -1:
+                for payload in payloads:
+                    yield start, start + len(phrase), payload
+                start = text.find(phrase, start + 1)
+
+
+# Metric of interest -> trigger words, in output order
+METRIC_KEYWORDS = MappingProxyType({
+    'base_salary': ('salary', 'base', 'compensation'),
+    'total_comp': ('total', 'total comp', 'total cash'),
+    'variable_pay': ('variable', 'bonus', 'incentive'),
+    'employee_count': ('employee', 'count', 'how many'),
+})
+
+# Percentile keyword -> percentile column; the first listed keyword found at the
+# start of a word wins
+PERCENTILE_MAP = MappingProxyType({
+    '10th': 'p10',
+    '25th': 'p25',
+    '50th': 'p50',
+    'median': 'p50',
+    '75th': 'p75',
+    '90th': 'p90',
+})
+
+# Common job title keywords for title comparisons
+TITLE_KEYWORDS = (
+    'data scientist', 'machine learning engineer', 'ml engineer',
+    'software engineer', 'senior software engineer', 'staff engineer',
+    'product manager', 'program manager', 'project manager',
+    'business analyst', 'data analyst', 'financial analyst',
+    'accountant', 'controller', 'treasurer',
+    'recruiter', 'hr business partner', 'compensation analyst'
+)
+
+# Words marking a broad, whole-category question ("all engineering salaries"),
+# matched as whole words ("all" must not match "call" or "overall")
+BROAD_INDICATORS = ('all', 'salaries', 'compensation', 'overview', 'entire', 'whole')
+
+# "people" alone is too vague ("engineering people"); only these phrases mean HR
+PEOPLE_PHRASES = ('people operations', 'people team', 'people department')
+
+# Job function patterns (fallback for when DB not available)
+FUNCTION_KEYWORDS = MappingProxyType({
+    'engineering': ('engineering', 'engineer', 'software', 'technical'),
+    'finance': ('finance', 'financial', 'accounting', 'treasury'),
+    'sales': ('sales', 'selling', 'revenue'),
+    'marketing': ('marketing', 'brand', 'advertising'),
+    'human resources': ('hr', 'human resources', 'people', 'talent'),
+    'legal': ('legal', 'counsel', 'compliance'),
+    'operations': ('operations', 'ops'),
+    'creative': ('creative', 'design', 'designer'),
+    'infrastructure': ('infrastructure', 'infra'),
+})
+
+# Job module patterns
+MODULE_KEYWORDS = MappingProxyType({
+    'infrastructure': ('infrastructure', 'infra'),
+    'technology': ('technology', 'tech'),
+})
+
+# Job level patterns with common aliases
+LEVEL_KEYWORDS = MappingProxyType({
+    'Entry (P1)': ('entry', 'p1', 'junior'),
+    'Developing (P2)': ('developing', 'p2', 'associate'),  # Associate = P2
+    'Career (P3)': ('career', 'p3', 'mid-level', 'senior associate'),  # Senior Associate = P3
+    'Advanced (P4)': ('advanced', 'p4', 'staff'),  # Staff = P4
+    'Expert (P5)': ('expert', 'p5', 'senior staff'),  # Senior Staff = P5
+    'Supervisor (M1)': ('supervisor', 'm1'),
+    'Sr Supervisor (M2)': ('sr supervisor', 'senior supervisor', 'm2'),
+    'Manager (M3)': ('manager', 'm3', 'mgr'),
+    'Sr Manager (M4)': ('sr manager', 'senior manager', 'm4'),
+    'Director (M5)': ('director', 'm5'),
+    'Senior Director (M6)': ('senior director', 'sr director', 'm6'),
+    'Principal (P6)': ('principal', 'p6'),
+})
+
+# Level aliases for common terms
+LEVEL_ALIASES = MappingProxyType({
+    'associate': 'Developing (P2)',
+    'senior associate': 'Career (P3)',
+    'staff': 'Advanced (P4)',
+    'senior staff': 'Expert (P5)',
+    'sr staff': 'Expert (P5)',
+})
+
+# Intent patterns with consistency rules
+INTENT_KEYWORDS = MappingProxyType({
+    'create_ranges': ('create salary range', 'create range', 'build range', 'salary structure', 'pay structure', 'range structure'),
+    'compare': ('compare', 'versus', 'vs', 'difference between'),
+    'compare_titles': ('compare', 'versus', 'vs', 'difference between'),  # Will be refined in extraction
+    'visualize': ('show', 'display', 'chart', 'graph', 'plot', 'visualize'),
+    'analyze': ('analyze', 'analysis', 'breakdown', 'examine'),
+    'progression': ('progression', 'career path', 'growth', 'advancement'),
+    'search': ('search', 'find', 'look for', 'locate'),
+    'query': ('what', 'how much', 'salary', 'compensation'),
+})
+
+# Query pattern consistency rules
+QUERY_PATTERNS = MappingProxyType({
+    'broad_category': {
+        'description': 'Queries like "Engineering salaries" or "Finance compensation"',
+        'strategy': 'search_roles_then_aggregate',
+        'indicators': ['all', 'salaries', 'compensation', 'overview']
+    },
+    'specific_role': {
+        'description': 'Queries like "Software Engineer P3" or "Finance Manager M3"',
+        'strategy': 'direct_query_with_filters',
+        'indicators': ['specific level', 'exact title', 'particular role']
+    },
+    'comparison': {
+        'description': 'Queries comparing two entities',
+        'strategy': 'query_both_then_compare',
+        'indicators': ['compare', 'vs', 'versus', 'difference']
+    },
+    'range_creation': {
+        'description': 'Queries asking to create salary ranges',
+        'strategy': 'calculate_ranges_with_spread',
+        'indicators': ['create range', 'salary structure', 'pay structure']
+    }
+})
+
+
+
+def _build_keyword_matcher() -> _PhraseMatcher:
+    """Matcher over the fixed keyword tables with (category, value) payloads"""
+    phrases = []
+    for level, keywords in LEVEL_KEYWORDS.items():
+        phrases.extend((keyword, ('level', level)) for keyword in keywords)
+    for intent, keywords in INTENT_KEYWORDS.items():
+        phrases.extend((keyword, ('intent', intent)) for keyword in keywords)
+    for metric, keywords in METRIC_KEYWORDS.items():
+        phrases.extend((keyword, ('metric', metric)) for keyword in keywords)
+    phrases.extend((keyword, ('percentile', keyword)) for keyword in PERCENTILE_MAP)
+    for function, keywords in FUNCTION_KEYWORDS.items():
+        for keyword in keywords:
+            if keyword == 'people':
+                phrases.extend((phrase, ('function', function)) for phrase in PEOPLE_PHRASES)
+            elif keyword in _WHOLE_WORD_KEYWORDS:
+                phrases.append((keyword, ('function_word', function)))
+            else:
+                phrases.append((keyword, ('function', function)))
+    for module, keywords in MODULE_KEYWORDS.items():
+        phrases.extend((keyword, ('module', module)) for keyword in keywords)
+    phrases.extend((indicator, ('broad', indicator)) for indicator in BROAD_INDICATORS)
+    phrases.extend((title, ('title', title)) for title in TITLE_KEYWORDS)
+    return _PhraseMatcher(phrases)
+
+
+# Built once at import and shared by every parser, so extract() scans the question once
+_KEYWORD_MATCHER = _build_keyword_matcher()
+
+# Database vocabularies shared by every parser in the process, keyed by absolute db path:
+# path -> (job functions, function lookup, job modules, module lookup)
+_DB_VOCAB_CACHE: Dict[str, Tuple[List[str], Dict[str, str], List[str], Dict[str, str]]] = {}
+_DB_VOCAB_LOCK = threading.Lock()  # Serializes loads into _DB_VOCAB_CACHE
+
+# Matchers over those shared vocabularies, so each is built once per process:
+# (kind, absolute db path) -> (vocabulary list, matcher)
+_DB_MATCHER_CACHE: Dict[Tuple[str, str], Tuple[List[str], '_PhraseMatcher']] = {}
 
 
 class EntityParser:
     """Fast entity extraction using regex and keyword matching"""
     
-    def __init__(self, db_path: str = 'compensation_data.db'):
+    # Keyword tables are shared, read-only class attributes
+    functions = FUNCTION_KEYWORDS
+    modules = MODULE_KEYWORDS
+    levels = LEVEL_KEYWORDS
+    level_aliases = LEVEL_ALIASES
+    intents = INTENT_KEYWORDS
+    query_patterns = QUERY_PATTERNS
+    
+    def __init__(self, db_path: str = 'compensation_data.db', max_cache_entries: int = 1024):
         """
         Initialize entity parser.
         
         Args:
             db_path: Path to database for validation
+            max_cache_entries: Maximum number of extract() results kept in the LRU
         """
         self.db_path = db_path
+        self.max_cache_entries = max_cache_entries
+        self._conn = None  # Read-only connection kept for the parser's lifetime
+        self._extract_cache: OrderedDict = OrderedDict()  # question -> entities
         self._db_job_functions = None  # Cache for database job functions
         self._db_job_modules = None  # Cache for database job modules
+        self._db_function_lookup: Dict[str, str] = {}  # Lowercased name -> database job function
+        self._db_module_lookup: Dict[str, str] = {}  # Lowercased name -> database job module
+        self._function_matcher = None  # (db functions, matcher) built from them
+        self._module_matcher = None  # (db modules, matcher) built from them
+        self._keyword_hits_cache = None  # (text, hits) for the question being extracted
+        
+        # Load the vocabularies now so the first question doesn't pay for it
+        self._load_db_vocab()
+    
+    def _keyword_hits(self, text: str) -> Dict[str, set]:
+        """
+        Keyword table values found in text, by category.
         
-        # Job function patterns (fallback for when DB not available)
-        self.functions = {
-            'engineering': ['engineering', 'engineer', 'software', 'technical'],
-            'finance': ['finance', 'financial', 'accounting', 'treasury'],
-            'sales': ['sales', 'selling', 'revenue'],
-            'marketing': ['marketing', 'brand', 'advertising'],
-            'human resources': ['hr', 'human resources', 'people', 'talent'],
-            'legal': ['legal', 'counsel', 'compliance'],
-            'operations': ['operations', 'ops'],
-            'creative': ['creative', 'design', 'designer'],
-            'infrastructure': ['infrastructure', 'infra'],
-        }
-        
-        # Job module patterns
-        self.modules = {
-            'infrastructure': ['infrastructure', 'infra'],
-            'technology': ['technology', 'tech'],
-        }
-        
-        # Job level patterns with common aliases
-        self.levels = {
-            'Entry (P1)': ['entry', 'p1', 'junior'],
-            'Developing (P2)': ['developing', 'p2', 'associate'],  # Associate = P2
-            'Career (P3)': ['career', 'p3', 'mid-level', 'senior associate'],  # Senior Associate = P3
-            'Advanced (P4)': ['advanced', 'p4', 'staff'],  # Staff = P4
-            'Expert (P5)': ['expert', 'p5', 'senior staff'],  # Senior Staff = P5
-            'Supervisor (M1)': ['supervisor', 'm1'],
-            'Sr Supervisor (M2)': ['sr supervisor', 'senior supervisor', 'm2'],
-            'Manager (M3)': ['manager', 'm3', 'mgr'],
-            'Sr Manager (M4)': ['sr manager', 'senior manager', 'm4'],
-            'Director (M5)': ['director', 'm5'],
-            'Senior Director (M6)': ['senior director', 'sr director', 'm6'],
-            'Principal (P6)': ['principal', 'p6'],
-        }
-        
-        # Level aliases for common terms
-        self.level_aliases = {
-            'associate': 'Developing (P2)',
-            'senior associate': 'Career (P3)',
-            'staff': 'Advanced (P4)',
-            'senior staff': 'Expert (P5)',
-            'sr staff': 'Expert (P5)',
-        }
-        
-        # Intent patterns with consistency rules
-        self.intents = {
-            'create_ranges': ['create salary range', 'create range', 'build range', 'salary structure', 'pay structure', 'range structure'],
-            'compare': ['compare', 'versus', 'vs', 'difference between'],
-            'compare_titles': ['compare', 'versus', 'vs', 'difference between'],  # Will be refined in extraction
-            'visualize': ['show', 'display', 'chart', 'graph', 'plot', 'visualize'],
-            'analyze': ['analyze', 'analysis', 'breakdown', 'examine'],
-            'progression': ['progression', 'career path', 'growth', 'advancement'],
-            'search': ['search', 'find', 'look for', 'locate'],
-            'query': ['what', 'how much', 'salary', 'compensation'],
-        }
-        
-        # Query pattern consistency rules
-        self.query_patterns = {
-            'broad_category': {
-                'description': 'Queries like "Engineering salaries" or "Finance compensation"',
-                'strategy': 'search_roles_then_aggregate',
-                'indicators': ['all', 'salaries', 'compensation', 'overview']
-            },
-            'specific_role': {
-                'description': 'Queries like "Software Engineer P3" or "Finance Manager M3"',
-                'strategy': 'direct_query_with_filters',
-                'indicators': ['specific level', 'exact title', 'particular role']
-            },
-            'comparison': {
-                'description': 'Queries comparing two entities',
-                'strategy': 'query_both_then_compare',
-                'indicators': ['compare', 'vs', 'versus', 'difference']
-            },
-            'range_creation': {
-                'description': 'Queries asking to create salary ranges',
-                'strategy': 'calculate_ranges_with_spread',
-                'indicators': ['create range', 'salary structure', 'pay structure']
-            }
-        }
+        The extractors all receive the same lowercased question, so the scan
+        runs once per extract() and the rest reuse it.
+        """
+        if self._keyword_hits_cache is not None and self._keyword_hits_cache[0] is text:
+            return self._keyword_hits_cache[1]
+        
+        hits: Dict[str, set] = {}
+        for start, end, (category, value) in _KEYWORD_MATCHER.iter(text):
+            if category == 'percentile' and start and text[start - 1].isalnum():
+                continue  # Must start a word: "110th" is not the 10th ("medians" still counts)
+            if category == 'function_word':
+                # Short keywords need exact match or word boundary
+                if not _is_whole_word(text, start, end):
+                    continue
+                category = 'function'
+            elif category == 'broad' and not _is_whole_word(text, start, end):
+                continue
+            hits.setdefault(category, set()).add(value)
+        self._keyword_hits_cache = (text, hits)
+        return hits
+    
+    def close(self):
+        """Close the database connection (reopened on demand if needed again)"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+    
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
     
     def extract(self, question: str) -> Dict[str, Any]:
         """
@@ -114,7 +427,16 @@ class EntityParser:
         Returns:
             Dictionary with extracted entities
         """
-        question_lower = question.lower()
+        # Parsing is deterministic for a fixed vocabulary, so repeated questions
+        # (retries, re-renders) are answered from the LRU
+        cached = self._extract_cache.get(question)
+        if cached is not None:
+            self._extract_cache.move_to_end(question)
+            return self._copy_entities(cached)
+        
+        # str.isascii() is a flag check; lowercase ASCII input can be used as is
+        # instead of being copied by lower()
+        question_lower = question if question.isascii() and question.islower() else question.lower()
         
         entities = {
             'functions': self._extract_functions(question_lower),
@@ -128,14 +450,65 @@ class EntityParser:
             'original_question': question
         }
         
-        # Validate against database
-        entities = self.validate_against_db(entities)
+        # Validate against database (the extractors above already retried a failed load)
+        if self._db_job_functions or self._db_job_modules:
+            entities = self.validate_against_db(entities)
+        else:
+            entities['validation'] = {'has_suggestions': False, 'suggestions': []}
         
         # Detect query pattern for consistency
         entities['query_pattern'] = self._detect_query_pattern(question_lower, entities)
         
+        # Only cache once both vocabularies loaded; a failed load is retried next call
+        if (self._db_job_functions is not None and self._db_job_modules is not None
+                and len(question) <= MAX_CACHED_QUESTION_LEN):
+            self._extract_cache[question] = self._copy_entities(entities)
+            if len(self._extract_cache) > self.max_cache_entries:
+                self._extract_cache.popitem(last=False)
+        
         return entities
     
+    def extract_many(self, questions: Sequence[str]) -> List[Dict[str, Any]]:
+        """
+        Extract entities from several questions in one call (e.g. bulk
+        re-scoring of logged questions).
+        
+        Questions are parsed in order against the vocabularies loaded once
+        for the parser; a question repeated within the batch is parsed once
+        and copied, even when the extract() cache is disabled.
+        
+        Args:
+            questions: User questions
+            
+        Returns:
+            Extracted entities in the same order as questions
+        """
+        parsed: Dict[str, Dict[str, Any]] = {}
+        results = []
+        for question in questions:
+            entities = parsed.get(question)
+            if entities is None:
+                entities = parsed[question] = self.extract(question)
+                results.append(entities)
+            else:
+                results.append(self._copy_entities(entities))
+        return results
+    
+    @staticmethod
+    def _copy_entities(entities: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy of an entities dict deep enough that callers can't mutate the cache"""
+        copied = {key: list(value) if isinstance(value, list) else value for key, value in entities.items()}
+        if 'validation' in entities:
+            validation = entities['validation']
+            copied['validation'] = {
+                'has_suggestions': validation['has_suggestions'],
+                'suggestions': [
+                    dict(suggestion, alternatives=list(suggestion['alternatives']))
+                    for suggestion in validation['suggestions']
+                ]
+            }
+        return copied
+    
     def _detect_query_pattern(self, text: str, entities: Dict[str, Any]) -> str:
         """
         Detect which query pattern this matches for consistency.
@@ -160,8 +533,7 @@ class EntityParser:
             return 'specific_role'
         
         # Check for broad category indicators
-        broad_indicators = ['all', 'salaries', 'compensation', 'overview', 'entire', 'whole']
-        if any(indicator in text for indicator in broad_indicators):
+        if self._keyword_hits(text).get('broad'):
             return 'broad_category'
         
         # Default to specific role if we have a function
@@ -174,117 +546,125 @@ class EntityParser:
         """Extract job functions from text"""
         found = []
         
-        # First, check for common multi-word phrases that should be matched as aliases
-        # This prevents "Business Operations" from matching just "Operations"
-        phrase_aliases = {
-            'business operations': 'Corporate & Business Services',
-            'business services': 'Corporate & Business Services',
-            'corporate services': 'Corporate & Business Services',
-        }
-        
-        for phrase, alias in phrase_aliases.items():
-            if phrase in text:
-                found.append(alias)
-                # Remove the phrase from text to prevent partial matches
-                text = text.replace(phrase, '')
-        
-        # Then, try to match against actual database values
-        # Sort by length (longest first) to match longer names before shorter ones
+        # Phrase aliases first, then database values longest first. One scan finds
+        # every candidate; spans claimed by an earlier phrase block later overlapping
+        # matches, so "Business Operations" does not also match "Operations".
         db_functions = self._load_db_job_functions()
-        if db_functions:
-            # Sort by length descending to match longer names first
-            sorted_functions = sorted(db_functions, key=len, reverse=True)
-            for db_func in sorted_functions:
-                # Check if the database function name appears in the text
-                if db_func.lower() in text and db_func not in found:
-                    found.append(db_func)
-                    # Remove matched function to prevent overlapping matches
-                    text = text.replace(db_func.lower(), '')
+        occurrences: Dict[Tuple[int, ...], List[Tuple[int, int]]] = {}
+        for start, end, rank in self._get_function_matcher(db_functions).iter(text):
+            occurrences.setdefault(rank, []).append((start, end))
+        
+        claimed: List[Tuple[int, int]] = []
+        for rank in sorted(occurrences):
+            spans = [
+                (start, end) for start, end in sorted(occurrences[rank])
+                if all(end <= c_start or start >= c_end for c_start, c_end in claimed)
+            ]
+            if not spans:
+                continue
+            
+            if rank[0] == 0:
+                start, end = spans[0]
+                found.append(PHRASE_ALIASES[text[start:end]])
+            else:
+                db_func = db_functions[rank[2]]
+                if db_func in found:
+                    continue
+                found.append(db_func)
+            
+            # Claim every non-overlapping occurrence, like str.replace would remove
+            last_end = -1
+            for start, end in spans:
+                if start >= last_end:
+                    claimed.append((start, end))
+                    last_end = end
         
         # If no DB matches, fall back to keyword matching
         if not found:
-            for function, keywords in self.functions.items():
-                for keyword in keywords:
-                    # Use word boundaries to avoid false matches
-                    # e.g., "people" in "engineering people" shouldn't match HR
-                    if keyword in ['hr', 'ops']:
-                        # Short keywords need exact match or word boundary
-                        if re.search(r'\b' + keyword + r'\b', text):
-                            found.append(function.title())
-                            break
-                    elif keyword == 'people':
-                        # Only match "people" if it's part of "people operations" or "people team"
-                        if 'people operations' in text or 'people team' in text or 'people department' in text:
-                            found.append(function.title())
-                            break
-                    elif keyword in text:
-                        found.append(function.title())
-                        break
+            hits = self._keyword_hits(text).get('function', ())
+            found.extend(function.title() for function in self.functions if function in hits)
         
         return found
     
+    def _get_function_matcher(self, db_functions: List[str]) -> _PhraseMatcher:
+        """
+        Matcher over phrase aliases and database function names.
+        
+        Payloads are sort ranks: (0, alias index) for aliases, then
+        (1, -length, db index) so longer database names are resolved first.
+        """
+        if self._function_matcher is None or self._function_matcher[0] is not db_functions:
+            def build():
+                phrases = [(phrase, (0, i)) for i, phrase in enumerate(PHRASE_ALIASES)]
+                phrases.extend(
+                    (db_func.lower(), (1, -len(db_func.lower()), i))
+                    for i, db_func in enumerate(db_functions)
+                )
+                return _PhraseMatcher(phrases)
+            self._function_matcher = self._shared_matcher('functions', db_functions, build)
+        return self._function_matcher[1]
+    
+    def _shared_matcher(self, kind: str, vocab: List[str], build) -> Tuple[List[str], _PhraseMatcher]:
+        """
+        (vocab, matcher) pair, reusing the process-wide matcher when vocab is
+        the shared vocabulary for this database.
+        
+        Vocabularies that are not shared (e.g. after a partial load) get a
+        private matcher so the cache never grows past one entry per database.
+        """
+        abs_path = os.path.abspath(self.db_path)
+        key = (kind, abs_path)
+        cached = _DB_MATCHER_CACHE.get(key)
+        if cached is not None and cached[0] is vocab:
+            return cached
+        
+        pair = (vocab, build())
+        shared = _DB_VOCAB_CACHE.get(abs_path)
+        if shared is not None and vocab is shared[0 if kind == 'functions' else 2]:
+            _DB_MATCHER_CACHE[key] = pair
+        return pair
+    
     def _extract_levels(self, text: str) -> List[str]:
         """Extract job levels from text"""
-        found = []
-        for level, keywords in self.levels.items():
-            if any(keyword in text for keyword in keywords):
-                found.append(level)
-        return found
+        hits = self._keyword_hits(text).get('level', ())
+        return [level for level in self.levels if level in hits]
     
     def _extract_intent(self, text: str) -> str:
         """Extract primary intent from text"""
-        for intent, keywords in self.intents.items():
-            if any(keyword in text for keyword in keywords):
+        hits = self._keyword_hits(text).get('intent', ())
+        for intent in self.intents:
+            if intent in hits:
                 return intent
         return 'query'  # default
     
     def _extract_metrics(self, text: str) -> List[str]:
         """Extract metrics of interest"""
-        metrics = []
-        if any(word in text for word in ['salary', 'base', 'compensation']):
-            metrics.append('base_salary')
-        if any(word in text for word in ['total', 'total comp', 'total cash']):
-            metrics.append('total_comp')
-        if any(word in text for word in ['variable', 'bonus', 'incentive']):
-            metrics.append('variable_pay')
-        if any(word in text for word in ['employee', 'count', 'how many']):
-            metrics.append('employee_count')
+        hits = self._keyword_hits(text).get('metric', ())
+        metrics = [metric for metric in METRIC_KEYWORDS if metric in hits]
         
         return metrics if metrics else ['base_salary']  # default
     
     def _extract_percentile(self, text: str) -> Optional[str]:
         """Extract percentile from text"""
-        percentile_map = {
-            '10th': 'p10',
-            '25th': 'p25',
-            '50th': 'p50',
-            'median': 'p50',
-            '75th': 'p75',
-            '90th': 'p90',
-        }
-        
-        for keyword, percentile in percentile_map.items():
-            if keyword in text:
+        hits = self._keyword_hits(text).get('percentile', ())
+        for keyword, percentile in PERCENTILE_MAP.items():
+            if keyword in hits:
                 return percentile
         
         return 'p50'  # default to median
     
     def _extract_spread(self, text: str) -> Optional[float]:
         """Extract spread percentage from text (e.g., '20%' -> 0.20)"""
-        import re
+        # Every phrasing names the spread; most questions don't, so skip the regex
+        # (text is the lowercased question)
+        if 'spread' not in text:
+            return None
         
         # Look for patterns like "20%", "spread 20", "20 percent"
-        patterns = [
-            r'spread[:\s]+(\d+)%?',
-            r'(\d+)%\s+spread',
-            r'(\d+)\s*percent\s+spread',
-            r'spread[:\s]+(\d+)\s*percent',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                return float(match.group(1)) / 100.0
+        match = _SPREAD_RE.match(text)
+        if match:
+            value = match.group('after') or match.group('pct') or match.group('percent')
+            return float(value) / 100.0
         
         return None  # No spread specified
     
@@ -293,84 +673,109 @@ class EntityParser:
         Extract job titles from comparison queries.
         Looks for patterns like "Compare X and Y" or "X vs Y"
         """
-        import re
-        
-        # Common job title keywords
-        title_keywords = [
-            'data scientist', 'machine learning engineer', 'ml engineer',
-            'software engineer', 'senior software engineer', 'staff engineer',
-            'product manager', 'program manager', 'project manager',
-            'business analyst', 'data analyst', 'financial analyst',
-            'accountant', 'controller', 'treasurer',
-            'recruiter', 'hr business partner', 'compensation analyst'
-        ]
-        
-        found_titles = []
-        
-        # Check for each keyword
-        for title in title_keywords:
-            if title in text:
-                found_titles.append(title)
+        # Check for each common job title keyword
+        hits = self._keyword_hits(text).get('title', ())
+        found_titles = [title for title in TITLE_KEYWORDS if title in hits]
         
         # If we found titles, return them
         if found_titles:
             return found_titles
         
+        # Fast path: each comparison pattern needs a literal "compare", "vs" or "versus",
+        # all of which are compare-intent keywords, so without that intent none can match
+        if 'compare' not in self._keyword_hits(text).get('intent', ()):
+            return []
+        
         # Try to extract from comparison patterns
         # Pattern: "compare X and Y" or "X vs Y" or "X versus Y"
-        comparison_patterns = [
-            r'compare\s+([^and]+?)\s+and\s+([^in]+?)(?:\s+in|\s+tell|\s+for|$)',
-            r'([^vs]+?)\s+vs\.?\s+([^in]+?)(?:\s+in|\s+tell|\s+for|$)',
-            r'([^versus]+?)\s+versus\s+([^in]+?)(?:\s+in|\s+tell|\s+for|$)',
-        ]
-        
-        for pattern in comparison_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in _COMPARISON_PATTERNS:
+            match = pattern.search(text)
             if match:
-                title1 = match.group(1).strip()
-                title2 = match.group(2).strip()
-                
                 # Clean up common words
-                for word in ['the', 'a', 'an']:
-                    title1 = re.sub(r'\b' + word + r'\b', '', title1, flags=re.IGNORECASE).strip()
-                    title2 = re.sub(r'\b' + word + r'\b', '', title2, flags=re.IGNORECASE).strip()
+                title1 = _ARTICLE_RE.sub('', match.group(1).strip()).strip()
+                title2 = _ARTICLE_RE.sub('', match.group(2).strip()).strip()
                 
                 if title1 and title2:
                     return [title1, title2]
         
         return []
     
+    def _load_db_vocab(self):
+        """
+        Load distinct job functions and modules over the parser's connection.
+        
+        Each vocabulary is only queried while it is still missing, and a
+        failure leaves it unset so the next call retries. Once both are
+        loaded they are shared with every other parser on the same database;
+        loads are serialized so concurrent first calls query SQLite only once.
+        """
+        abs_path = os.path.abspath(self.db_path)
+        if self._adopt_shared_vocab(abs_path):
+            return
+        
+        with _DB_VOCAB_LOCK:
+            # Another parser may have finished loading while this one waited
+            if not self._adopt_shared_vocab(abs_path):
+                self._query_db_vocab(abs_path)
+    
+    def _adopt_shared_vocab(self, abs_path: str) -> bool:
+        """Use the process-wide vocabularies for abs_path if they are loaded"""
+        shared = _DB_VOCAB_CACHE.get(abs_path)
+        if shared is None:
+            return False
+        (self._db_job_functions, self._db_function_lookup,
+         self._db_job_modules, self._db_module_lookup) = shared
+        return True
+    
+    def _query_db_vocab(self, abs_path: str):
+        """Query the missing vocabularies; the caller holds _DB_VOCAB_LOCK"""
+        if self._conn is None:
+            try:
+                # mode=ro: never creates an empty database file when db_path is wrong
+                uri = f"file:{pathname2url(abs_path)}?mode=ro"
+                self._conn = sqlite3.connect(uri, uri=True, timeout=5, check_same_thread=False)
+                self._conn.execute("PRAGMA query_only=ON")
+                # Read pages straight from the mapping instead of read() into a small page cache
+                self._conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+                self._conn.execute("PRAGMA cache_size=-2000")
+            except Exception as e:
+                print(f"⚠️  Could not open database for validation: {e}")
+                self._conn = None
+                return
+        
+        cursor = self._conn.cursor()
+        
+        if self._db_job_functions is None:
+            try:
+                cursor.execute(_DB_FUNCTIONS_SQL)
+                self._db_job_functions = [row[0] for row in cursor.fetchall()]
+                self._db_function_lookup = self._lowercase_lookup(self._db_job_functions)
+            except Exception as e:
+                print(f"⚠️  Could not load job functions from database: {e}")
+        
+        if self._db_job_modules is None:
+            try:
+                cursor.execute(_DB_MODULES_SQL)
+                self._db_job_modules = [row[0] for row in cursor.fetchall()]
+                self._db_module_lookup = self._lowercase_lookup(self._db_job_modules)
+            except Exception as e:
+                print(f"⚠️  Could not load job modules from database: {e}")
+        
+        if self._db_job_functions is not None and self._db_job_modules is not None:
+            _DB_VOCAB_CACHE[abs_path] = (self._db_job_functions, self._db_function_lookup,
+                                         self._db_job_modules, self._db_module_lookup)
+    
     def _load_db_job_functions(self) -> List[str]:
         """Load distinct job functions from database"""
-        if self._db_job_functions is not None:
-            return self._db_job_functions
-        
-        try:
-            conn = sqlite3.connect(self.db_path, timeout=5)
-            cursor = conn.cursor()
-            cursor.execute("SELECT DISTINCT job_function FROM job_positions ORDER BY job_function")
-            self._db_job_functions = [row[0] for row in cursor.fetchall()]
-            conn.close()
-            return self._db_job_functions
-        except Exception as e:
-            print(f"⚠️  Could not load job functions from database: {e}")
-            return []
+        if self._db_job_functions is None:
+            self._load_db_vocab()
+        return self._db_job_functions if self._db_job_functions is not None else []
     
     def _load_db_job_modules(self) -> List[str]:
         """Load distinct job modules from database"""
-        if self._db_job_modules is not None:
-            return self._db_job_modules
-        
-        try:
-            conn = sqlite3.connect(self.db_path, timeout=5)
-            cursor = conn.cursor()
-            cursor.execute("SELECT DISTINCT job_module FROM job_positions WHERE job_module IS NOT NULL ORDER BY job_module")
-            self._db_job_modules = [row[0] for row in cursor.fetchall()]
-            conn.close()
-            return self._db_job_modules
-        except Exception as e:
-            print(f"⚠️  Could not load job modules from database: {e}")
-            return []
+        if self._db_job_modules is None:
+            self._load_db_vocab()
+        return self._db_job_modules if self._db_job_modules is not None else []
     
     def _extract_modules(self, text: str) -> List[str]:
         """Extract job modules from text"""
@@ -379,34 +784,53 @@ class EntityParser:
         # First, try to match against actual database values
         db_modules = self._load_db_job_modules()
         if db_modules:
-            for db_module in db_modules:
-                # Check if the database module name appears in the text
-                if db_module.lower() in text:
-                    found.append(db_module)
+            if self._module_matcher is None or self._module_matcher[0] is not db_modules:
+                self._module_matcher = self._shared_matcher(
+                    'modules', db_modules,
+                    lambda: _PhraseMatcher((m.lower(), i) for i, m in enumerate(db_modules)))
+            
+            # Every module name that appears in the text, in database order
+            hits = {i for _, _, i in self._module_matcher[1].iter(text)}
+            found.extend(db_modules[i] for i in sorted(hits))
         
         # If no DB matches, fall back to keyword matching
         if not found:
-            for module, keywords in self.modules.items():
-                for keyword in keywords:
-                    if keyword in text:
-                        found.append(module.title())
-                        break
+            hits = self._keyword_hits(text).get('module', ())
+            found.extend(module.title() for module in self.modules if module in hits)
         
         return found
     
-    def get_exact_match(self, term: str, db_values: List[str]) -> Optional[str]:
+    @staticmethod
+    def _lowercase_lookup(db_values: List[str]) -> Dict[str, str]:
+        """Map each lowercased value to its first database spelling, built once per load"""
+        lookup = {}
+        for value in db_values:
+            lookup.setdefault(value.lower(), value)
+        return lookup
+    
+    def get_exact_match(
+        self,
+        term: str,
+        db_values: List[str],
+        lower_map: Optional[Dict[str, str]] = None
+    ) -> Optional[str]:
         """
         Find exact case-insensitive match in database values.
         
         Args:
             term: Term to match
             db_values: List of valid database values
+            lower_map: Optional lowercased value -> value map built from db_values
+                (see _lowercase_lookup); turns the scan into one dict lookup
             
         Returns:
             Exact match or None
         """
         term_lower = term.lower().strip()
         
+        if lower_map is not None:
+            return lower_map.get(term_lower)
+        
         for value in db_values:
             if value.lower() == term_lower:
                 return value
@@ -430,8 +854,19 @@ class EntityParser:
         Returns:
             List of suggested alternatives
         """
+        if RAPIDFUZZ_AVAILABLE:
+            # fuzz.ratio scores the longest common subsequence, an upper bound on
+            # difflib's ratio, so values below the cutoff here can never be suggested
+            # and are dropped in C before difflib ranks the rest
+            db_values = [
+                value for value, _, _ in process.extract(
+                    term, db_values, scorer=fuzz.ratio, limit=None,
+                    score_cutoff=SUGGESTION_CUTOFF * 100 - 1e-6
+                )
+            ]
+        
         # Use difflib for fuzzy matching
-        matches = get_close_matches(term, db_values, n=max_suggestions, cutoff=0.6)
+        matches = get_close_matches(term, db_values, n=max_suggestions, cutoff=SUGGESTION_CUTOFF)
         return matches
     
     def requires_user_confirmation(self, extracted: str, matched: str) -> bool:
@@ -462,7 +897,8 @@ class EntityParser:
         db_modules = self._load_db_job_modules()
         
         if not db_functions and not db_modules:
-            # Database not available, return as-is
+            # Database not available, nothing to validate or suggest
+            entities['validation'] = {'has_suggestions': False, 'suggestions': []}
             return entities
         
         validated_functions = []
@@ -472,7 +908,7 @@ class EntityParser:
         # Validate functions
         for func in entities.get('functions', []):
             # Try exact match
-            exact_match = self.get_exact_match(func, db_functions)
+            exact_match = self.get_exact_match(func, db_functions, self._db_function_lookup)
             
             if exact_match:
                 validated_functions.append(exact_match)
@@ -490,7 +926,7 @@ class EntityParser:
         # Validate modules
         for module in entities.get('modules', []):
             # Try exact match
-            exact_match = self.get_exact_match(module, db_modules)
+            exact_match = self.get_exact_match(module, db_modules, self._db_module_lookup)
             
             if exact_match:
                 validated_modules.append(exact_match)
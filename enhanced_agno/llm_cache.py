@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+LLM Cache - Reuses Claude execution plans for repeated questions
+Avoids a network round-trip (and token cost) when a question was already planned
+"""
+
+import hashlib
+import importlib.util
+import json
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from urllib.request import pathname2url
+
+import numpy as np
+
+# sentence-transformers pulls in torch, so only check for it here and import lazily
+SEMANTIC_CACHE_AVAILABLE = importlib.util.find_spec('sentence_transformers') is not None
+
+MMAP_SIZE = 256 * 1024 * 1024  # Map up to 256MB of the database file
+
+
+class LLMCache:
+    """
+    Multi-level cache for LLM execution plans.
+
+    L1: in-memory LRU keyed by question hash (per process)
+    L2: SQLite table in the compensation database (survives restarts)
+    L3: optional semantic lookup for near-duplicate questions
+    """
+
+    def __init__(self, db_path: str = 'compensation_data.db', max_memory_entries: int = 256,
+                 semantic: bool = True, similarity_threshold: float = 0.90,
+                 embedding_model: str = 'all-MiniLM-L6-v2'):
+        """
+        Initialize the plan cache.
+
+        Args:
+            db_path: Path to the SQLite database holding the cache tables
+            max_memory_entries: Maximum number of plans kept in the in-memory LRU
+            semantic: Whether to match near-duplicate questions by embedding similarity
+            similarity_threshold: Minimum cosine similarity for a semantic hit
+            embedding_model: sentence-transformers model used for question embeddings
+        """
+        self.db_path = db_path
+        self.max_memory_entries = max_memory_entries
+        self.semantic = semantic and SEMANTIC_CACHE_AVAILABLE
+        self.similarity_threshold = similarity_threshold
+        self.embedding_model = embedding_model
+        self._memory: OrderedDict = OrderedDict()
+        self._conn = None
+        
+        # Semantic index, loaded from SQLite on first use
+        self._encoder = None
+        self._vectors: Optional[np.ndarray] = None
+        self._semantic_entries: List[Dict[str, Any]] = []
+
+        try:
+            # Private page cache (the pooled query connections open the file without a URI),
+            # with memory-mapped reads so warm lookups skip the read() syscalls
+            uri = f"file:{pathname2url(os.path.abspath(self.db_path))}?mode=rwc"
+            self._conn = sqlite3.connect(uri, uri=True, timeout=10, check_same_thread=False)
+            self._conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS plan_cache (
+                    question_hash TEXT PRIMARY KEY,
+                    plan_json TEXT NOT NULL,
+                    created_at INTEGER NOT NULL
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS semantic_plan_cache (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    embedding BLOB NOT NULL,
+                    signature TEXT NOT NULL,
+                    plan_json TEXT NOT NULL,
+                    created_at INTEGER NOT NULL
+                )
+            """)
+            self._conn.commit()
+        except sqlite3.Error as e:
+            print(f"⚠️  Plan cache disabled (database unavailable): {e}")
+            self._conn = None
+
+    @staticmethod
+    def context_hash(context: Optional[List[Any]]) -> str:
+        """Hash the recent conversation context a plan was built in"""
+        return hashlib.sha256(json.dumps(context or [], sort_keys=True).encode()).hexdigest()
+
+    @classmethod
+    def question_hash(cls, question: str, context: Optional[List[Any]] = None) -> str:
+        """Hash a question (normalized for whitespace and case) together with its context"""
+        normalized = question.strip().lower()
+        return hashlib.sha256(f"{normalized}\x00{cls.context_hash(context)}".encode()).hexdigest()
+
+    @classmethod
+    def entity_signature(cls, entities: Optional[Dict[str, Any]], context: Optional[List[Any]] = None) -> str:
+        """
+        Summarize the entities and conversation context a plan depends on.
+
+        Semantic hits are only accepted when the signature matches, so
+        "Finance managers" never reuses a plan built for "Sales managers",
+        and "compare them to finance" never reuses a plan where "them"
+        referred to something else.
+        """
+        entities = entities or {}
+        return json.dumps({
+            'functions': sorted(entities.get('functions') or []),
+            'levels': sorted(entities.get('levels') or []),
+            'intent': entities.get('intent'),
+            'context': cls.context_hash(context)
+        }, sort_keys=True)
+
+    def get(self, question: str, entities: Optional[Dict[str, Any]] = None,
+            context: Optional[List[Any]] = None) -> Optional[List[Any]]:
+        """
+        Look up a cached plan for a question.
+
+        Args:
+            question: User's question
+            entities: Extracted entities, used to validate semantic hits
+            context: Conversation context the plan prompt includes; a different context is a miss
+
+        Returns:
+            Cached plan or None on a miss
+        """
+        key = self.question_hash(question, context)
+
+        # L1: in-memory
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key]
+
+        # L2: SQLite
+        if self._conn is None:
+            return None
+
+        try:
+            row = self._conn.execute(
+                "SELECT plan_json FROM plan_cache WHERE question_hash = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+
+        if row is not None:
+            plan = json.loads(row[0])
+            self._remember(key, plan)
+            return plan
+
+        # L3: semantic near-duplicate
+        if self.semantic:
+            return self._semantic_get(question, entities, context)
+
+        return None
+
+    def put(self, question: str, plan: List[Any], entities: Optional[Dict[str, Any]] = None,
+            context: Optional[List[Any]] = None) -> None:
+        """
+        Store a plan for a question in all cache levels.
+
+        Args:
+            question: User's question
+            plan: Execution plan returned by the LLM
+            entities: Extracted entities the plan was built from
+            context: Conversation context the plan prompt included
+        """
+        key = self.question_hash(question, context)
+        self._remember(key, plan)
+
+        if self._conn is None:
+            return
+
+        try:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO plan_cache (question_hash, plan_json, created_at) VALUES (?, ?, ?)",
+                (key, json.dumps(plan), int(time.time()))
+            )
+            self._conn.commit()
+        except sqlite3.Error as e:
+            print(f"⚠️  Could not persist plan to cache: {e}")
+            return
+
+        if self.semantic:
+            self._semantic_put(question, plan, entities, context)
+
+    def _get_encoder(self):
+        """Load the embedding model on first use"""
+        if self._encoder is None:
+            try:
+                from sentence_transformers import SentenceTransformer
+                self._encoder = SentenceTransformer(self.embedding_model)
+            except Exception as e:
+                print(f"⚠️  Semantic plan cache disabled: {e}")
+                self.semantic = False
+        return self._encoder
+
+    def _embed(self, question: str) -> Optional[np.ndarray]:
+        """Encode a question to a unit-length float32 vector"""
+        encoder = self._get_encoder()
+        if encoder is None:
+            return None
+        vector = encoder.encode(question.strip().lower(), normalize_embeddings=True)
+        return np.asarray(vector, dtype=np.float32)
+
+    def _load_semantic_index(self) -> None:
+        """Load stored embeddings into a single matrix for brute-force search"""
+        if self._vectors is not None:
+            return
+
+        rows = self._conn.execute(
+            "SELECT embedding, signature, plan_json FROM semantic_plan_cache ORDER BY id"
+        ).fetchall()
+
+        self._semantic_entries = [{'signature': sig, 'plan_json': plan_json} for _, sig, plan_json in rows]
+        if rows:
+            self._vectors = np.vstack([np.frombuffer(blob, dtype=np.float32) for blob, _, _ in rows])
+        else:
+            self._vectors = np.empty((0, 0), dtype=np.float32)
+
+    def _semantic_get(self, question: str, entities: Optional[Dict[str, Any]],
+                      context: Optional[List[Any]]) -> Optional[List[Any]]:
+        """Return the plan of the most similar cached question, if close enough"""
+        try:
+            self._load_semantic_index()
+            if not self._semantic_entries:
+                return None
+
+            vector = self._embed(question)
+            if vector is None:
+                return None
+
+            # Vectors are normalized, so the dot product is the cosine similarity
+            similarities = self._vectors @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.similarity_threshold:
+                return None
+
+            entry = self._semantic_entries[best]
+            if entry['signature'] != self.entity_signature(entities, context):
+                return None
+
+            plan = json.loads(entry['plan_json'])
+            self._remember(self.question_hash(question, context), plan)
+            return plan
+        except Exception as e:
+            print(f"⚠️  Semantic cache lookup failed: {e}")
+            return None
+
+    def _semantic_put(self, question: str, plan: List[Any], entities: Optional[Dict[str, Any]],
+                      context: Optional[List[Any]]) -> None:
+        """Store the question embedding alongside its plan"""
+        try:
+            self._load_semantic_index()
+            vector = self._embed(question)
+            if vector is None:
+                return
+
+            signature = self.entity_signature(entities, context)
+            plan_json = json.dumps(plan)
+            self._conn.execute(
+                "INSERT INTO semantic_plan_cache (embedding, signature, plan_json, created_at) VALUES (?, ?, ?, ?)",
+                (vector.tobytes(), signature, plan_json, int(time.time()))
+            )
+            self._conn.commit()
+
+            self._semantic_entries.append({'signature': signature, 'plan_json': plan_json})
+            if self._vectors.size == 0:
+                self._vectors = vector.reshape(1, -1)
+            else:
+                self._vectors = np.vstack([self._vectors, vector])
+        except Exception as e:
+            print(f"⚠️  Could not store semantic cache entry: {e}")
+
+    def _remember(self, key: str, plan: List[Any]) -> None:
+        """Insert into the in-memory LRU, evicting the oldest entry when full"""
+        self._memory[key] = plan
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def clear(self) -> None:
+        """Clear both cache levels"""
+        self._memory.clear()
+        self._vectors = None
+        self._semantic_entries = []
+        if self._conn is not None:
+            self._conn.execute("DELETE FROM plan_cache")
+            self._conn.execute("DELETE FROM semantic_plan_cache")
+            self._conn.commit()
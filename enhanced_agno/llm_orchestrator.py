@@ -3,21 +3,58 @@
 LLM Orchestrator - Uses Claude for planning and response generation
 """
 
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional
 import json
 
 
+# Tool schema used to get the execution plan back as structured input
+# instead of free text that has to be stripped of ```json fences
+EXECUTION_PLAN_TOOL = {
+    "name": "create_execution_plan",
+    "description": "Record the ordered tool calls needed to answer a compensation question.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "steps": {
+                "type": "array",
+                "description": "2-4 tool calls in execution order",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "tool": {
+                            "type": "string",
+                            "enum": ["query_database", "create_comparison", "visualize", "calculate_stats"]
+                        },
+                        "params": {"type": "object"}
+                    },
+                    "required": ["tool"]
+                }
+            }
+        },
+        "required": ["steps"]
+    }
+}
+
+
 class LLMOrchestrator:
     """Uses LLM for high-level reasoning, not data processing"""
     
-    def __init__(self, claude_client, conversation_manager):
+    def __init__(self, claude_client, conversation_manager, cache=None):
         self.claude = claude_client
         self.conversation = conversation_manager
+        self.cache = cache  # Optional LLMCache for repeated questions
     
-    def plan_execution(self, question: str, entities: Dict[str, Any]) -> Dict[str, Any]:
+    def plan_execution(self, question: str, entities: Dict[str, Any],
+                       before_llm_call: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
         """
         Use LLM to create execution plan.
         Returns structured plan with tool calls.
+        
+        Args:
+            question: User's question
+            entities: Extracted entities
+            before_llm_call: Called right before Claude is actually requested (not for
+                fallback or cached plans), so callers can overlap work with the wait
         """
         if not self.claude:
             return self._fallback_plan(entities)
@@ -25,6 +62,13 @@ class LLMOrchestrator:
         try:
             context = self.conversation.get_context_summary()
             
+            # Reuse the plan if this (or a near-identical) question was already planned
+            # with the same context in the prompt
+            if self.cache:
+                cached_plan = self.cache.get(question, entities, [context])
+                if cached_plan is not None:
+                    return {'status': 'success', 'plan': cached_plan, 'source': 'cache'}
+            
             prompt = f"""You are a compensation analysis assistant. Create an execution plan.
 
 Question: {question}
@@ -32,59 +76,34 @@ Extracted Entities: {json.dumps(entities, indent=2)}
 Context: {context}
 
 Available Tools:
-- query_database: Query compensation data
+- query_database: Query compensation data (params: {{"function": "Engineering"}})
 - create_comparison: Compare two datasets
-- visualize: Create charts
+- visualize: Create charts (params: {{"type": "distribution"}})
 - calculate_stats: Calculate statistics
 
-IMPORTANT: Return ONLY a valid JSON array. No explanation, no markdown, just the JSON array.
-
-Format:
-[
-  {{"tool": "query_database", "params": {{"function": "Engineering"}}}},
-  {{"tool": "visualize", "params": {{"type": "distribution"}}}}
-]
-
-Return 2-4 steps as a JSON array:"""
+Call create_execution_plan with 2-4 steps."""
+            
+            if before_llm_call is not None:
+                before_llm_call()
             
             message = self.claude.messages.create(
                 model="claude-3-haiku-20240307",
-                max_tokens=500,
+                max_tokens=200,
+                tools=[EXECUTION_PLAN_TOOL],
+                tool_choice={"type": "tool", "name": EXECUTION_PLAN_TOOL["name"]},
                 messages=[{"role": "user", "content": prompt}]
             )
             
-            response_text = message.content[0].text.strip()
-            
-            # Debug: print what Claude returned
-            if not response_text:
-                print(f"⚠️  Claude returned empty response")
+            tool_call = next((block for block in message.content if block.type == "tool_use"), None)
+            if tool_call is None or not isinstance(tool_call.input.get('steps'), list):
+                print(f"⚠️  Claude did not return a structured plan")
                 return self._fallback_plan(entities)
             
-            # Extract JSON - try multiple methods
-            json_text = response_text
-            
-            # Method 1: Look for ```json blocks
-            if '```json' in response_text:
-                json_text = response_text.split('```json')[1].split('```')[0].strip()
-            # Method 2: Look for any ``` blocks
-            elif '```' in response_text:
-                json_text = response_text.split('```')[1].split('```')[0].strip()
-            # Method 3: Look for [ or { at start
-            elif '[' in response_text:
-                start = response_text.index('[')
-                # Find matching ]
-                json_text = response_text[start:]
-                if ']' in json_text:
-                    end = json_text.rindex(']') + 1
-                    json_text = json_text[:end]
+            plan = tool_call.input['steps']
             
-            # Try to parse
-            if not json_text or json_text == response_text and not json_text.startswith('['):
-                print(f"⚠️  Could not extract JSON from Claude response")
-                print(f"     Response preview: {response_text[:100]}...")
-                return self._fallback_plan(entities)
+            if self.cache:
+                self.cache.put(question, plan, entities, [context])
             
-            plan = json.loads(json_text)
             return {'status': 'success', 'plan': plan, 'source': 'llm'}
             
         except Exception as e:
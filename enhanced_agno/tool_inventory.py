@@ -4,15 +4,45 @@ Tool Inventory - Discovers and manages workspace tools
 Critical component: Prefer existing tools over creating new code
 """
 
+import io
 import os
 import subprocess
+import sys
+import tempfile
+import threading
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass
 from datetime import datetime
 import re
 
 
+# Function name fragments used to spot comparison-style tool names
+FUNCTION_PATTERNS = {
+    'engineering': ['engineering', 'eng'],
+    'finance': ['finance', 'fin'],
+    'sales': ['sales'],
+    'marketing': ['marketing', 'mkt'],
+    'hr': ['hr', 'human'],
+}
+
+# For each function, one compiled alternation of every *other* function's fragments
+_OTHER_FUNCTION_RES = {
+    key: re.compile('|'.join(
+        re.escape(p) for other, patterns in FUNCTION_PATTERNS.items() if other != key for p in patterns
+    ))
+    for key in FUNCTION_PATTERNS
+}
+_ANY_FUNCTION_RE = re.compile('|'.join(
+    re.escape(p) for patterns in FUNCTION_PATTERNS.values() for p in patterns
+))
+
+# Report-type keywords; the lookahead reports overlapping hits like "pay range width"
+_REPORT_KEYWORD_RE = re.compile(r'(?=(transparency|range width|pay range|market data|architecture|career ladder))')
+
+
 @dataclass
 class ToolInfo:
     """Information about a workspace tool"""
@@ -120,30 +150,13 @@ NO - Tool is for market data but query asks for transparency report"""
             
             # Make sure tool doesn't contain other function names (indicating it's a comparison)
             # Check for common abbreviations too
-            function_patterns = {
-                'engineering': ['engineering', 'eng'],
-                'finance': ['finance', 'fin'],
-                'sales': ['sales'],
-                'marketing': ['marketing', 'mkt'],
-                'hr': ['hr', 'human'],
-            }
-            
-            # Get patterns for current function
-            current_patterns = []
-            for key, patterns in function_patterns.items():
-                if func in patterns or key == func:
-                    current_patterns = patterns
-                    break
-            
-            # Check if tool contains other function names
-            for key, patterns in function_patterns.items():
-                # Skip current function
-                if func in patterns or key == func:
-                    continue
-                # Check if any pattern for other functions is in tool name
-                for pattern in patterns:
-                    if pattern in name_lower:
-                        return False
+            current_key = next(
+                (key for key, patterns in FUNCTION_PATTERNS.items() if func in patterns or key == func),
+                None
+            )
+            other_functions_re = _OTHER_FUNCTION_RES[current_key] if current_key else _ANY_FUNCTION_RE
+            if other_functions_re.search(name_lower):
+                return False
             
             # Match intent
             if intent in ['query', 'analyze'] and ('analysis' in name_lower or 'salary' in name_lower):
@@ -169,6 +182,7 @@ class ToolInventory:
         self.workspace_path = Path(workspace_path)
         self.tools: Dict[str, ToolInfo] = {}
         self.claude_client = claude_client
+        self._code_cache: Dict[Path, Tuple[float, Any]] = {}  # path -> (mtime, compiled code)
         self.scan_workspace()
     
     def scan_workspace(self):
@@ -281,19 +295,19 @@ class ToolInventory:
         if not functions:
             return None
         
-        # First, try exact keyword matching for report types
-        question_lower = question.lower()
+        # First, try exact keyword matching for report types (one regex pass)
+        keywords = set(_REPORT_KEYWORD_RE.findall(question.lower()))
         
         # Check for specific report type keywords
-        if 'transparency' in question_lower or 'range width' in question_lower:
+        if 'transparency' in keywords or 'range width' in keywords:
             if 'generate_pay_transparency_report' in self.tools:
                 return 'generate_pay_transparency_report'
         
-        if ('pay range' in question_lower or 'market data' in question_lower) and 'transparency' not in question_lower:
+        if ('pay range' in keywords or 'market data' in keywords) and 'transparency' not in keywords:
             if 'generate_pay_range_report' in self.tools:
                 return 'generate_pay_range_report'
         
-        if 'architecture' in question_lower or 'career ladder' in question_lower:
+        if 'architecture' in keywords or 'career ladder' in keywords:
             if 'generate_job_architecture_report' in self.tools:
                 return 'generate_job_architecture_report'
         
@@ -304,7 +318,8 @@ class ToolInventory:
         
         return None
     
-    def execute_tool(self, tool_name: str, params: Dict[str, Any] = None) -> Dict[str, Any]:
+    def execute_tool(self, tool_name: str, params: Dict[str, Any] = None,
+                     in_process: bool = True, stream: bool = True) -> Dict[str, Any]:
         """
         Execute an existing tool.
         
@@ -312,6 +327,17 @@ class ToolInventory:
         - Faster (no query construction)
         - More reliable (proven code)
         - Consistent output
+        
+        Tools are trusted workspace scripts, so by default they run inside the
+        agent's interpreter and skip process startup and re-importing pandas and
+        matplotlib. A subprocess is used when the workspace is not the current
+        directory, since the scripts open files relative to it.
+        
+        Args:
+            tool_name: Name of the tool to run
+            params: Unused, kept for interface compatibility
+            in_process: Whether to run the tool in the current interpreter
+            stream: Whether to echo a subprocess tool's output as it is produced
         """
         tool_info = self.tools.get(tool_name)
         if not tool_info:
@@ -323,18 +349,15 @@ class ToolInventory:
         print(f"   ✅ Using existing tool: {tool_name}")
         
         try:
-            result = subprocess.run(
-                ['python3', str(tool_info.path)],
-                capture_output=True,
-                text=True,
-                timeout=30,
-                cwd=self.workspace_path
-            )
+            if in_process and self.workspace_path.resolve() == Path.cwd():
+                output, error = self._run_in_process(tool_info.path)
+            else:
+                output, error = self._run_subprocess(tool_info.path, stream=stream)
             
             return {
                 'status': 'success',
-                'output': result.stdout,
-                'error': result.stderr if result.returncode != 0 else None,
+                'output': output,
+                'error': error,
                 'tool_used': tool_name,
                 'tool_description': tool_info.description
             }
@@ -350,6 +373,114 @@ class ToolInventory:
                 'message': f'Error executing {tool_name}: {str(e)}'
             }
     
+    def _run_subprocess(self, script_path: Path, stream: bool = True,
+                        timeout: float = 30) -> Tuple[str, Optional[str]]:
+        """
+        Run a tool script in a child interpreter, reading its output line by line.
+        
+        Returns:
+            Tuple of (stdout, stderr if the script failed else None)
+            
+        Raises:
+            subprocess.TimeoutExpired: If the script runs longer than timeout
+        """
+        with tempfile.TemporaryFile(mode='w+') as stderr_file:
+            proc = subprocess.Popen(
+                [sys.executable, str(script_path)],
+                stdout=subprocess.PIPE,
+                stderr=stderr_file,
+                text=True,
+                bufsize=1,
+                cwd=self.workspace_path
+            )
+            
+            # Iterating stdout blocks, so a timer enforces the timeout
+            timed_out = threading.Event()
+            
+            def kill():
+                timed_out.set()
+                proc.kill()
+            
+            timer = threading.Timer(timeout, kill)
+            timer.start()
+            try:
+                lines = []
+                for line in proc.stdout:
+                    if stream:
+                        print(line, end='')
+                    lines.append(line)
+                returncode = proc.wait()
+            finally:
+                timer.cancel()
+                proc.stdout.close()
+            
+            if timed_out.is_set():
+                raise subprocess.TimeoutExpired(proc.args, timeout)
+            
+            stderr_file.seek(0)
+            error = stderr_file.read() if returncode != 0 else None
+        
+        return ''.join(lines), error
+    
+    def _compile_tool(self, script_path: Path):
+        """Compile a tool script, reusing the code object until the file changes"""
+        mtime = script_path.stat().st_mtime
+        cached = self._code_cache.get(script_path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        
+        code = compile(script_path.read_text(), str(script_path), 'exec')
+        self._code_cache[script_path] = (mtime, code)
+        return code
+    
+    def _run_in_process(self, script_path: Path, timeout: float = 30) -> Tuple[str, Optional[str]]:
+        """
+        Run a tool script as __main__ in the current interpreter.
+        
+        The script runs on a worker thread so the timeout can be enforced like
+        on the subprocess path. A timed-out script cannot be killed; it keeps
+        running in the background but no longer holds the agent or its output.
+        
+        Returns:
+            Tuple of (captured stdout, captured stderr and traceback if the
+            script failed else None)
+            
+        Raises:
+            subprocess.TimeoutExpired: If the script runs longer than timeout
+        """
+        code = self._compile_tool(script_path)
+        namespace = {'__name__': '__main__', '__file__': str(script_path)}
+        stdout_buffer = io.StringIO()
+        stderr_buffer = io.StringIO()
+        failure = []
+        
+        def run():
+            try:
+                exec(code, namespace)
+            except SystemExit as e:
+                if e.code not in (None, 0):
+                    failure.append(f"Exited with status {e.code}\n")
+            except Exception:
+                failure.append(traceback.format_exc())
+        
+        # The redirects are process-wide, so they are undone here even if the script hangs
+        worker = threading.Thread(target=run, daemon=True)
+        with redirect_stdout(stdout_buffer), redirect_stderr(stderr_buffer):
+            worker.start()
+            worker.join(timeout)
+        
+        if worker.is_alive():
+            raise subprocess.TimeoutExpired(str(script_path), timeout)
+        
+        # Scripts save their charts and exit; in-process their figures would stay open
+        pyplot = sys.modules.get('matplotlib.pyplot')
+        if pyplot is not None:
+            pyplot.close('all')
+        
+        # Like the subprocess path, stderr is only reported when the script failed
+        error = stderr_buffer.getvalue() + failure[0] if failure else None
+        return stdout_buffer.getvalue(), error
+    
     def get_tool_description(self, tool_name: str) -> str:
         """Get human-readable description of tool"""
         tool_info = self.tools.get(tool_name)
@@ -5,9 +5,13 @@ Demonstrates key improvements: fast parsing, LLM planning, auto-visualization
 """
 
 import os
+import importlib.util
 import sys
 import sqlite3
+import threading
+import numpy as np
 import pandas as pd
+from functools import lru_cache
 from typing import Dict, Any, Optional, List
 
 # Add enhanced_agno to path
@@ -17,24 +21,27 @@ from entity_parser import EntityParser
 from conversation_manager import ConversationManager
 from visualization_engine import VisualizationEngine
 from llm_orchestrator import LLMOrchestrator
+from llm_cache import LLMCache
+from connection_pool import ConnectionPool
 from tool_inventory import ToolInventory
 from analysis_engine import AnalysisEngine
 from result_formatter import ResultFormatter
-from error_handler import ErrorHandler, with_error_handling
+from error_handler import ErrorHandler
 from suggestion_engine import SuggestionEngine
 from export_manager import ExportManager
 from comparison_engine import ComparisonEngine
 from result_validator import ResultValidator
 from query_logger import QueryLogger
 
-# Try to import Claude
-try:
-    import anthropic
-    CLAUDE_AVAILABLE = True
-except ImportError:
-    CLAUDE_AVAILABLE = False
+# Check for Claude without importing it; anthropic (httpx, pydantic, ...) is only
+# imported once an API key is actually configured
+CLAUDE_AVAILABLE = importlib.util.find_spec('anthropic') is not None
+if not CLAUDE_AVAILABLE:
     print("⚠️  anthropic not installed. Run: pip install anthropic")
 
+# HTTP/2 needs the optional h2 package; keep-alive pooling works either way
+HTTP2_AVAILABLE = importlib.util.find_spec('h2') is not None
+
 # Load environment
 try:
     from dotenv import load_dotenv
@@ -43,6 +50,49 @@ except ImportError:
     pass
 
 
+# Standard career progression order used when querying a single function
+LEVEL_ORDER_SQL = """
+                CASE 
+                    WHEN jp.job_level LIKE 'Entry%' THEN 1
+                    WHEN jp.job_level LIKE 'Developing%' THEN 2
+                    WHEN jp.job_level LIKE 'Career%' THEN 3
+                    WHEN jp.job_level LIKE 'Advanced%' THEN 4
+                    WHEN jp.job_level LIKE 'Manager (M3)%' THEN 5
+                    WHEN jp.job_level LIKE 'Expert%' THEN 6
+                    WHEN jp.job_level LIKE 'Sr Manager%' THEN 7
+                    WHEN jp.job_level LIKE 'Director%' THEN 8
+                    WHEN jp.job_level LIKE 'Principal%' THEN 9
+                    WHEN jp.job_level LIKE 'Senior Director%' THEN 10
+                    ELSE 99
+                END, avg_salary ASC
+                """
+
+PERCENTILES = ('p10', 'p25', 'p50', 'p75', 'p90')
+
+# Columns covered by each _search_job_roles search_in option
+ROLE_SEARCH_COLUMNS = {
+    'all': ('job_title', 'job_function', 'job_area', 'job_focus'),
+    'title': ('job_title',),
+    'area': ('job_area',),
+    'focus': ('job_focus',),
+    'function': ('job_function',),
+}
+
+# Covering indexes matching the agent's filter/join shape. The partial indexes
+# only hold rows with usable pay data, mirroring the "col > 0" filters.
+QUERY_INDEXES = {
+    'idx_jp_func_level': "ON job_positions(job_function, job_level, id)",
+    'idx_cm_job_lfy_p50': (
+        "ON compensation_metrics(job_position_id, base_salary_lfy_p50, base_salary_lfy_emp_count) "
+        "WHERE base_salary_lfy_p50 > 0"
+    ),
+    'idx_cm_job_total_p50': (
+        "ON compensation_metrics(job_position_id, total_comp_p50, base_salary_lfy_emp_count) "
+        "WHERE total_comp_p50 > 0"
+    ),
+}
+
+
 class EnhancedAgnoAgent:
     """
     Enhanced Agno Agent - MVP Implementation
@@ -57,6 +107,14 @@ class EnhancedAgnoAgent:
     def __init__(self, debug: bool = False):
         self.db_path = 'compensation_data.db'
         self.debug = debug  # Debug flag for verbose output
+        self._ensure_indexes()
+        self.db_pool = ConnectionPool(self.db_path)  # Reused read-only connections
+        
+        # Compensation query templates, one per percentile column
+        self._query_templates = {
+            col: self._build_query_template(col)
+            for col in (f'cm.{metric}_{p}' for metric in ('base_salary_lfy', 'total_comp') for p in PERCENTILES)
+        }
         
         # Initialize Claude first (needed for LLM-guided visualization)
         self.claude_client = None
@@ -64,7 +122,16 @@ class EnhancedAgnoAgent:
             api_key = os.getenv('ANTHROPIC_API_KEY')
             if api_key and api_key != 'your-claude-api-key-here':
                 try:
-                    self.claude_client = anthropic.Anthropic(api_key=api_key)
+                    import anthropic
+                    import httpx
+                    
+                    # One persistent client so later calls reuse the TCP/TLS connection
+                    http_client = httpx.Client(
+                        http2=HTTP2_AVAILABLE,
+                        limits=httpx.Limits(max_keepalive_connections=4, max_connections=8),
+                        timeout=httpx.Timeout(30.0, connect=5.0)
+                    )
+                    self.claude_client = anthropic.Anthropic(api_key=api_key, http_client=http_client)
                     print("✅ Claude AI initialized")
                 except Exception as e:
                     print(f"⚠️  Claude initialization failed: {e}")
@@ -85,8 +152,9 @@ class EnhancedAgnoAgent:
         self.result_validator = ResultValidator()  # Validate query results
         self.query_logger = QueryLogger(enabled=debug, verbose=debug)  # Log queries
         
-        # Initialize LLM orchestrator
-        self.llm = LLMOrchestrator(self.claude_client, self.conversation)
+        # Initialize LLM orchestrator (plans for repeated questions come from cache)
+        self.llm_cache = LLMCache(db_path=self.db_path) if self.claude_client else None
+        self.llm = LLMOrchestrator(self.claude_client, self.conversation, cache=self.llm_cache)
         
         print("🤖 Enhanced Agno Agent Ready (Full Feature Set)")
         print(f"   Entity Parser: ✅")
@@ -102,6 +170,23 @@ class EnhancedAgnoAgent:
         print(f"   Query Logger: ✅")
         print(f"   Claude AI: {'✅' if self.claude_client else '⚠️  Fallback mode'}")
 
+    def _ensure_indexes(self):
+        """Create the query indexes once; refresh planner statistics only when something was added"""
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+            missing = [name for name in QUERY_INDEXES if name not in existing]
+            
+            for name in missing:
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {name} {QUERY_INDEXES[name]}")
+            if missing:
+                conn.execute("ANALYZE")
+                conn.commit()
+            
+            conn.close()
+        except sqlite3.Error as e:
+            print(f"⚠️  Could not create query indexes: {e}")
+    
     def ask(self, question: str, session_id: str = None) -> str:
         """
         Process a question with enhanced capabilities.
@@ -271,14 +356,24 @@ class EnhancedAgnoAgent:
             else:
                 print("         No existing tool found, creating new query...")
                 
-                # Step 3: LLM creates plan
+                # Step 3: LLM creates plan (warm the database while waiting on Claude;
+                # fallback and cached plans return at once, so there is no wait to hide)
                 print("   [3/5] Creating execution plan...")
-                plan_result = self.llm.plan_execution(question, entities)
+                warmups = []
+                
+                def start_warmup():
+                    warmup = threading.Thread(target=self._warm_up_database, args=(entities,), daemon=True)
+                    warmup.start()
+                    warmups.append(warmup)
+                
+                plan_result = self.llm.plan_execution(question, entities, before_llm_call=start_warmup)
                 plan = plan_result['plan']
                 print(f"         Plan: {len(plan)} steps ({plan_result['source']})")
                 
                 # Step 4: Execute plan
                 print("   [4/5] Executing plan...")
+                for warmup in warmups:
+                    warmup.join(timeout=5)
                 results = self._execute_plan(plan, entities)
                 
                 print("   [5/5] Generating response...")
@@ -345,6 +440,28 @@ class EnhancedAgnoAgent:
         
         return formatted_output
     
+    def _warm_up_database(self, entities: Dict[str, Any]):
+        """
+        Pull the pages the upcoming query will need into a pooled connection's cache.
+        
+        Runs in the background while Claude plans, so it must never raise.
+        """
+        try:
+            functions = entities.get('functions', [])
+            with self.db_pool.connection() as conn:
+                if functions:
+                    placeholders = ','.join('?' for _ in functions)
+                    conn.execute(f"""
+                        SELECT COUNT(*), SUM(cm.base_salary_lfy_p50)
+                        FROM job_positions jp
+                        JOIN compensation_metrics cm ON jp.id = cm.job_position_id
+                        WHERE jp.job_function IN ({placeholders})
+                    """, functions).fetchone()
+                else:
+                    conn.execute("SELECT 1").fetchone()
+        except Exception:
+            pass
+    
     def _execute_plan(self, plan: list, entities: Dict[str, Any]) -> Dict[str, Any]:
         """Execute the plan using tools (no LLM)"""
         results = {}
@@ -401,170 +518,98 @@ class EnhancedAgnoAgent:
             Dictionary with query results and metadata
         """
         try:
-            conn = sqlite3.connect(self.db_path, timeout=10)
-            
-            functions = entities.get('functions', [])
-            levels = entities.get('levels', [])
-            percentile = entities.get('percentile', 'p50')
-            
-            # Override with params if provided
-            if 'function' in params:
-                functions = [params['function']]
-            if 'limit' in params:
-                limit = params['limit']
-            if 'include_rollups' in params:
-                include_rollups = params['include_rollups']
-            if 'include_executives' in params:
-                include_executives = params['include_executives']
-            
-            # Build query
-            where_conditions = []
-            query_params = []
-            
-            if functions:
-                placeholders = ','.join(['?' for _ in functions])
-                where_conditions.append(f"jp.job_function IN ({placeholders})")
-                query_params.extend(functions)
-            
-            if levels:
-                placeholders = ','.join(['?' for _ in levels])
-                where_conditions.append(f"jp.job_level IN ({placeholders})")
-                query_params.extend(levels)
-            
-            where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
-            
-            # Determine which compensation column to use based on query
-            question_lower = entities.get('original_question', '').lower()
-            if 'total comp' in question_lower or 'total cash' in question_lower:
-                percentile_col = f'cm.total_comp_{percentile}'
-            else:
-                percentile_col = f'cm.base_salary_lfy_{percentile}'
-            
-            # Build ORDER BY clause - prioritize standard career levels
-            order_by = "avg_salary ASC"
-            
-            # If querying a single function, get standard career progression levels
-            if len(functions) == 1:
-                # Prefer standard P/M levels over roll-ups and executive levels
-                order_by = """
-                CASE 
-                    WHEN jp.job_level LIKE 'Entry%' THEN 1
-                    WHEN jp.job_level LIKE 'Developing%' THEN 2
-                    WHEN jp.job_level LIKE 'Career%' THEN 3
-                    WHEN jp.job_level LIKE 'Advanced%' THEN 4
-                    WHEN jp.job_level LIKE 'Manager (M3)%' THEN 5
-                    WHEN jp.job_level LIKE 'Expert%' THEN 6
-                    WHEN jp.job_level LIKE 'Sr Manager%' THEN 7
-                    WHEN jp.job_level LIKE 'Director%' THEN 8
-                    WHEN jp.job_level LIKE 'Principal%' THEN 9
-                    WHEN jp.job_level LIKE 'Senior Director%' THEN 10
-                    ELSE 99
-                END, avg_salary ASC
-                """
-            
-            # Build filter conditions for job levels
-            level_filters = []
-            if not include_rollups:
-                level_filters.append("jp.job_level NOT LIKE '%Roll-Up%'")
-            if not include_executives:
-                level_filters.append("jp.job_level NOT LIKE '%Executive%'")
-            
-            # Combine all WHERE conditions
-            all_conditions = [where_clause]
-            all_conditions.append(f"{percentile_col} IS NOT NULL")
-            all_conditions.append(f"{percentile_col} > 0")
-            all_conditions.extend(level_filters)
-            
-            final_where_clause = " AND ".join(all_conditions)
-            
-            # Build LIMIT clause
-            limit_clause = f"LIMIT {limit}" if limit is not None else ""
-            
-            query = f"""
-            SELECT 
-                jp.job_function,
-                jp.job_level,
-                ROUND(AVG({percentile_col}), 0) as avg_salary,
-                SUM(cm.base_salary_lfy_emp_count) as employees,
-                COUNT(DISTINCT jp.id) as positions
-            FROM job_positions jp
-            JOIN compensation_metrics cm ON jp.id = cm.job_position_id
-            WHERE {final_where_clause}
-            GROUP BY jp.job_function, jp.job_level
-            ORDER BY {order_by}
-            {limit_clause}
-            """
-            
-            # Log query before execution
-            self.query_logger.log_query(query, query_params)
-            
-            # Get total count without LIMIT for transparency
-            count_query = f"""
-            SELECT COUNT(*) as total_count
-            FROM (
-                SELECT jp.job_function, jp.job_level
-                FROM job_positions jp
-                JOIN compensation_metrics cm ON jp.id = cm.job_position_id
-                WHERE {final_where_clause}
-                GROUP BY jp.job_function, jp.job_level
-            ) subquery
-            """
-            
-            cursor = conn.cursor()
-            cursor.execute(count_query, query_params)
-            total_available = cursor.fetchone()[0]
-            
-            self.query_logger.log_result_count(total_available, 'total_available')
-            
-            # Debug output
-            if self.debug:
-                print("\n" + "="*70)
-                print("🔍 DEBUG: SQL QUERY")
-                print("="*70)
-                print(query)
-                print("\n📋 Query Parameters:", query_params)
-                print(f"\n📊 Total available records: {total_available}")
-                print(f"📊 Limit applied: {limit if limit else 'None'}")
-                print("\n📊 Column Mappings:")
-                print("  Report Column          → Database Column")
-                print("  " + "-"*66)
-                print("  job_function           → jp.job_function")
-                print("  job_level              → jp.job_level")
-                print(f"  avg_salary             → ROUND(AVG({percentile_col}), 0)")
-                print("  employees              → SUM(cm.base_salary_lfy_emp_count)")
-                print("  positions              → COUNT(DISTINCT jp.id)")
-                print("\n📁 Tables:")
-                print("  jp  = job_positions")
-                print("  cm  = compensation_metrics")
-                print("="*70 + "\n")
-            
-            df = pd.read_sql_query(query, conn, params=query_params)
-            
-            self.query_logger.log_result_count(len(df), 'query_result')
-            
-            if self.debug:
-                print(f"📊 Query returned {len(df)} rows (of {total_available} total)")
-                if not df.empty:
-                    print(f"📋 Columns: {list(df.columns)}")
-                    print(f"📈 Sample row: {df.iloc[0].to_dict()}")
+            with self.db_pool.connection() as conn:
+                functions = entities.get('functions', [])
+                levels = entities.get('levels', [])
+                percentile = entities.get('percentile', 'p50')
+            
+                # Override with params if provided
+                if 'function' in params:
+                    functions = [params['function']]
+                if 'limit' in params:
+                    limit = params['limit']
+                if 'include_rollups' in params:
+                    include_rollups = params['include_rollups']
+                if 'include_executives' in params:
+                    include_executives = params['include_executives']
+            
+                # Bind values in placeholder order: functions, then levels
+                query_params = list(functions) + list(levels)
+            
+                # Determine which compensation column to use based on query
+                question_lower = entities.get('original_question', '').lower()
+                if 'total comp' in question_lower or 'total cash' in question_lower:
+                    percentile_col = f'cm.total_comp_{percentile}'
+                else:
+                    percentile_col = f'cm.base_salary_lfy_{percentile}'
             
-            if df.empty:
-                # Get available job functions for suggestions BEFORE closing connection
-                cursor = conn.cursor()
-                cursor.execute("SELECT DISTINCT job_function FROM job_positions ORDER BY job_function LIMIT 10")
-                available_functions = [row[0] for row in cursor.fetchall()]
-                conn.close()
+                # SQL text depends only on the filter shape, so it is rendered once per shape;
+                # identical text also hits SQLite's statement cache. LIMIT is bound as a parameter
+                query_template = (
+                    self._query_templates.get(percentile_col) or self._build_query_template(percentile_col)
+                )
+                query = self._render_query(
+                    query_template,
+                    len(functions),
+                    len(levels),
+                    bool(include_rollups),
+                    bool(include_executives),
+                    limit is not None
+                )
+                main_params = query_params + [limit] if limit is not None else query_params
+            
+                # Log query before execution
+                self.query_logger.log_query(query, main_params)
+            
+                # Debug output
+                if self.debug:
+                    print("\n" + "="*70)
+                    print("🔍 DEBUG: SQL QUERY")
+                    print("="*70)
+                    print(query)
+                    print("\n📋 Query Parameters:", main_params)
+                    print(f"📊 Limit applied: {limit if limit else 'None'}")
+                    print("\n📊 Column Mappings:")
+                    print("  Report Column          → Database Column")
+                    print("  " + "-"*66)
+                    print("  job_function           → jp.job_function")
+                    print("  job_level              → jp.job_level")
+                    print(f"  avg_salary             → ROUND(AVG({percentile_col}), 0)")
+                    print("  employees              → SUM(cm.base_salary_lfy_emp_count)")
+                    print("  positions              → COUNT(DISTINCT jp.id)")
+                    print("\n📁 Tables:")
+                    print("  jp  = job_positions")
+                    print("  cm  = compensation_metrics")
+                    print("="*70 + "\n")
+            
+                df = pd.read_sql_query(query, conn, params=main_params)
+            
+                # Total group count (ignoring LIMIT) comes back on every row via COUNT(*) OVER ()
+                total_available = int(df['total_count'].iloc[0]) if not df.empty else 0
+                df = df.drop(columns='total_count')
+            
+                self.query_logger.log_result_count(total_available, 'total_available')
+                self.query_logger.log_result_count(len(df), 'query_result')
+            
+                if self.debug:
+                    print(f"📊 Query returned {len(df)} rows (of {total_available} total)")
+                    if not df.empty:
+                        print(f"📋 Columns: {list(df.columns)}")
+                        print(f"📈 Sample row: {df.iloc[0].to_dict()}")
+            
+                if df.empty:
+                    # Get available job functions for suggestions
+                    cursor = conn.cursor()
+                    cursor.execute("SELECT DISTINCT job_function FROM job_positions ORDER BY job_function LIMIT 10")
+                    available_functions = [row[0] for row in cursor.fetchall()]
                 
-                return {
-                    'status': 'no_results',
-                    'total_available': total_available,
-                    'message': 'No results found for the specified criteria',
-                    'suggestions': available_functions,
-                    'help': 'Try one of the available job functions listed above'
-                }
-            
-            # Close connection after all queries are done
-            conn.close()
+                    return {
+                        'status': 'no_results',
+                        'total_available': total_available,
+                        'message': 'No results found for the specified criteria',
+                        'suggestions': available_functions,
+                        'help': 'Try one of the available job functions listed above'
+                    }
             
             # Check if results were limited
             is_limited = limit is not None and len(df) < total_available
@@ -637,6 +682,85 @@ class EnhancedAgnoAgent:
                 'help': 'Please check your query parameters and try again'
             }
     
+    @staticmethod
+    def _build_query_template(percentile_col: str) -> str:
+        """
+        Build the compensation SQL template for a percentile column.
+        
+        The total_count window column reports how many groups matched before
+        LIMIT, so no separate count query is needed.
+        
+        Args:
+            percentile_col: Column to aggregate (e.g. 'cm.base_salary_lfy_p50')
+            
+        Returns:
+            SQL template with {where}, {order_by} and {limit} slots
+        """
+        return f"""
+                SELECT 
+                    jp.job_function,
+                    jp.job_level,
+                    ROUND(AVG({percentile_col}), 0) as avg_salary,
+                    SUM(cm.base_salary_lfy_emp_count) as employees,
+                    COUNT(DISTINCT jp.id) as positions,
+                    COUNT(*) OVER () as total_count
+                FROM job_positions jp
+                JOIN compensation_metrics cm ON jp.id = cm.job_position_id
+                WHERE {{where}}
+                  AND {percentile_col} IS NOT NULL
+                  AND {percentile_col} > 0
+                GROUP BY jp.job_function, jp.job_level
+                ORDER BY {{order_by}}
+                {{limit}}
+                """
+    
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def _render_query(
+        query_template: str,
+        function_count: int,
+        level_count: int,
+        include_rollups: bool,
+        include_executives: bool,
+        has_limit: bool
+    ) -> str:
+        """
+        Fill a compensation query template for one filter shape.
+        
+        Args:
+            query_template: Template from _build_query_template
+            function_count: Number of job functions to filter on
+            level_count: Number of job levels to filter on
+            include_rollups: Whether to include Roll-Up job levels
+            include_executives: Whether to include Executive job levels
+            has_limit: Whether a LIMIT parameter is bound
+            
+        Returns:
+            SQL text with ? placeholders for functions, levels and limit
+        """
+        where_conditions = []
+        if function_count:
+            where_conditions.append(f"jp.job_function IN ({','.join('?' * function_count)})")
+        if level_count:
+            where_conditions.append(f"jp.job_level IN ({','.join('?' * level_count)})")
+        if not where_conditions:
+            where_conditions.append("1=1")
+        
+        # Build filter conditions for job levels
+        if not include_rollups:
+            where_conditions.append("jp.job_level NOT LIKE '%Roll-Up%'")
+        if not include_executives:
+            where_conditions.append("jp.job_level NOT LIKE '%Executive%'")
+        
+        # If querying a single function, prefer standard P/M levels over roll-ups and executive levels
+        order_by = LEVEL_ORDER_SQL if function_count == 1 else "avg_salary ASC"
+        
+        return query_template.format(
+            where=" AND ".join(where_conditions),
+            order_by=order_by,
+            limit="LIMIT ?" if has_limit else ""
+        )
+    
     def _query_by_module(
         self,
         entities: Dict[str, Any],
@@ -653,58 +777,55 @@ class EnhancedAgnoAgent:
             Dictionary with module query results and breakdown
         """
         try:
-            conn = sqlite3.connect(self.db_path, timeout=10)
+            with self.db_pool.connection() as conn:
+                modules = entities.get('modules', [])
+                percentile = entities.get('percentile', 'p50')
+                percentile_col = f'cm.base_salary_lfy_{percentile}'
             
-            modules = entities.get('modules', [])
-            percentile = entities.get('percentile', 'p50')
-            percentile_col = f'cm.base_salary_lfy_{percentile}'
-            
-            if not modules:
-                return {'status': 'error', 'message': 'No module specified'}
-            
-            module = modules[0]  # Use first module
-            
-            # Get summary statistics for the module
-            summary_query = f"""
-            SELECT 
-                COUNT(DISTINCT jp.job_function) as unique_functions,
-                COUNT(DISTINCT jp.job_level) as unique_levels,
-                COUNT(DISTINCT jp.id) as total_positions,
-                SUM(cm.base_salary_lfy_emp_count) as total_employees,
-                ROUND(AVG({percentile_col}), 0) as avg_salary,
-                ROUND(MIN({percentile_col}), 0) as min_salary,
-                ROUND(MAX({percentile_col}), 0) as max_salary
-            FROM job_positions jp
-            JOIN compensation_metrics cm ON jp.id = cm.job_position_id
-            WHERE jp.job_module = ?
-                AND {percentile_col} IS NOT NULL
-                AND {percentile_col} > 0
-            """
-            
-            summary_df = pd.read_sql_query(summary_query, conn, params=[module])
-            
-            # Get breakdown by function
-            breakdown_query = f"""
-            SELECT 
-                jp.job_function,
-                COUNT(DISTINCT jp.job_level) as levels,
-                COUNT(DISTINCT jp.id) as positions,
-                SUM(cm.base_salary_lfy_emp_count) as employees,
-                ROUND(AVG({percentile_col}), 0) as avg_salary,
-                ROUND(MIN({percentile_col}), 0) as min_salary,
-                ROUND(MAX({percentile_col}), 0) as max_salary
-            FROM job_positions jp
-            JOIN compensation_metrics cm ON jp.id = cm.job_position_id
-            WHERE jp.job_module = ?
-                AND {percentile_col} IS NOT NULL
-                AND {percentile_col} > 0
-            GROUP BY jp.job_function
-            ORDER BY employees DESC
-            """
-            
-            breakdown_df = pd.read_sql_query(breakdown_query, conn, params=[module])
+                if not modules:
+                    return {'status': 'error', 'message': 'No module specified'}
+            
+                module = modules[0]  # Use first module
+            
+                # Get summary statistics for the module
+                summary_query = f"""
+                SELECT 
+                    COUNT(DISTINCT jp.job_function) as unique_functions,
+                    COUNT(DISTINCT jp.job_level) as unique_levels,
+                    COUNT(DISTINCT jp.id) as total_positions,
+                    SUM(cm.base_salary_lfy_emp_count) as total_employees,
+                    ROUND(AVG({percentile_col}), 0) as avg_salary,
+                    ROUND(MIN({percentile_col}), 0) as min_salary,
+                    ROUND(MAX({percentile_col}), 0) as max_salary
+                FROM job_positions jp
+                JOIN compensation_metrics cm ON jp.id = cm.job_position_id
+                WHERE jp.job_module = ?
+                    AND {percentile_col} IS NOT NULL
+                    AND {percentile_col} > 0
+                """
             
-            conn.close()
+                summary_df = pd.read_sql_query(summary_query, conn, params=[module])
+            
+                # Get breakdown by function
+                breakdown_query = f"""
+                SELECT 
+                    jp.job_function,
+                    COUNT(DISTINCT jp.job_level) as levels,
+                    COUNT(DISTINCT jp.id) as positions,
+                    SUM(cm.base_salary_lfy_emp_count) as employees,
+                    ROUND(AVG({percentile_col}), 0) as avg_salary,
+                    ROUND(MIN({percentile_col}), 0) as min_salary,
+                    ROUND(MAX({percentile_col}), 0) as max_salary
+                FROM job_positions jp
+                JOIN compensation_metrics cm ON jp.id = cm.job_position_id
+                WHERE jp.job_module = ?
+                    AND {percentile_col} IS NOT NULL
+                    AND {percentile_col} > 0
+                GROUP BY jp.job_function
+                ORDER BY employees DESC
+                """
+            
+                breakdown_df = pd.read_sql_query(breakdown_query, conn, params=[module])
             
             if summary_df.empty or breakdown_df.empty:
                 return {
@@ -749,12 +870,19 @@ class EnhancedAgnoAgent:
         if not data:
             return {}
         
-        salaries = [d['avg_salary'] for d in data if 'avg_salary' in d]
+        salaries = np.fromiter(
+            (d['avg_salary'] for d in data if 'avg_salary' in d), dtype=np.float64
+        )
+        if not salaries.size:
+            return {'min_salary': 0, 'max_salary': 0, 'median_salary': 0}
+        
+        # Upper-middle element, as before; partition is O(n) instead of a full sort
+        middle = salaries.size // 2
         
         return {
-            'min_salary': min(salaries) if salaries else 0,
-            'max_salary': max(salaries) if salaries else 0,
-            'median_salary': sorted(salaries)[len(salaries)//2] if salaries else 0,
+            'min_salary': salaries.min().item(),
+            'max_salary': salaries.max().item(),
+            'median_salary': np.partition(salaries, middle)[middle].item(),
         }
     
     def _create_salary_ranges(self, entities: Dict[str, Any]) -> Dict[str, Any]:
@@ -779,30 +907,28 @@ class EnhancedAgnoAgent:
             else:
                 salary_col = f'cm.base_salary_lfy_{percentile}'
             
-            conn = sqlite3.connect(self.db_path, timeout=10)
+            with self.db_pool.connection() as conn:
+                # Query all levels for the function
+                query = f"""
+                SELECT 
+                    jp.job_level,
+                    {salary_col} as midpoint,
+                    ROUND({salary_col} * (1 - {spread}/2), 0) as range_min,
+                    ROUND({salary_col} * (1 + {spread}/2), 0) as range_max,
+                    ROUND({salary_col} * {spread}, 0) as range_width,
+                    cm.base_salary_lfy_emp_count as employee_count
+                FROM job_positions jp
+                JOIN compensation_metrics cm ON jp.id = cm.job_position_id
+                WHERE jp.job_function = ?
+                  AND {salary_col} IS NOT NULL
+                  AND {salary_col} > 0
+                  AND jp.job_level NOT LIKE '%Roll-Up%'
+                  AND jp.job_level NOT LIKE '%Executive%'
+                GROUP BY jp.job_level
+                ORDER BY midpoint ASC
+                """
             
-            # Query all levels for the function
-            query = f"""
-            SELECT 
-                jp.job_level,
-                {salary_col} as midpoint,
-                ROUND({salary_col} * (1 - {spread}/2), 0) as range_min,
-                ROUND({salary_col} * (1 + {spread}/2), 0) as range_max,
-                ROUND({salary_col} * {spread}, 0) as range_width,
-                cm.base_salary_lfy_emp_count as employee_count
-            FROM job_positions jp
-            JOIN compensation_metrics cm ON jp.id = cm.job_position_id
-            WHERE jp.job_function = ?
-              AND {salary_col} IS NOT NULL
-              AND {salary_col} > 0
-              AND jp.job_level NOT LIKE '%Roll-Up%'
-              AND jp.job_level NOT LIKE '%Executive%'
-            GROUP BY jp.job_level
-            ORDER BY midpoint ASC
-            """
-            
-            df = pd.read_sql_query(query, conn, params=[function])
-            conn.close()
+                df = pd.read_sql_query(query, conn, params=[function])
             
             if df.empty:
                 return {
@@ -898,61 +1024,48 @@ class EnhancedAgnoAgent:
                 }
             
             # Get compensation data for both titles
-            conn = sqlite3.connect(self.db_path, timeout=10)
+            with self.db_pool.connection() as conn:
+                # Determine which compensation column to use
+                question_lower = entities.get('original_question', '').lower()
+                if 'total comp' in question_lower or 'total cash' in question_lower:
+                    comp_col = 'cm.total_comp_p50'
+                else:
+                    comp_col = 'cm.base_salary_lfy_p50'
+            
+                # Both titles in one round-trip; each UNION ALL branch is tagged so a
+                # position matching both titles still counts toward each
+                branch = f"""
+                SELECT 
+                    ? as title_group,
+                    jp.job_title,
+                    jp.job_area,
+                    jp.job_focus,
+                    jp.job_level,
+                    AVG({comp_col}) as avg_comp,
+                    COUNT(DISTINCT jp.id) as position_count
+                FROM job_positions jp
+                JOIN compensation_metrics cm ON jp.id = cm.job_position_id
+                WHERE jp.job_function LIKE ?
+                  AND (jp.job_area LIKE ? OR jp.job_focus LIKE ? OR jp.job_title LIKE ?)
+                  AND {comp_col} IS NOT NULL
+                GROUP BY jp.job_level
+                """
+                query = f"{branch} UNION ALL {branch} ORDER BY title_group, avg_comp"
             
-            # Determine which compensation column to use
-            question_lower = entities.get('original_question', '').lower()
-            if 'total comp' in question_lower or 'total cash' in question_lower:
-                comp_col = 'cm.total_comp_p50'
-            else:
-                comp_col = 'cm.base_salary_lfy_p50'
-            
-            # Query for title 1
-            title1_area = roles1[0].get('job_area', '')
-            title1_focus = roles1[0].get('job_focus', '')
-            
-            query1 = f"""
-            SELECT 
-                jp.job_title,
-                jp.job_area,
-                jp.job_focus,
-                jp.job_level,
-                AVG({comp_col}) as avg_comp,
-                COUNT(DISTINCT jp.id) as position_count
-            FROM job_positions jp
-            JOIN compensation_metrics cm ON jp.id = cm.job_position_id
-            WHERE jp.job_function LIKE '%{function}%'
-              AND (jp.job_area LIKE '%{title1_area}%' OR jp.job_focus LIKE '%{title1_focus}%' OR jp.job_title LIKE '%{title1}%')
-              AND {comp_col} IS NOT NULL
-            GROUP BY jp.job_level
-            ORDER BY avg_comp
-            """
-            
-            df1 = pd.read_sql_query(query1, conn)
-            
-            # Query for title 2
-            title2_area = roles2[0].get('job_area', '')
-            title2_focus = roles2[0].get('job_focus', '')
-            
-            query2 = f"""
-            SELECT 
-                jp.job_title,
-                jp.job_area,
-                jp.job_focus,
-                jp.job_level,
-                AVG({comp_col}) as avg_comp,
-                COUNT(DISTINCT jp.id) as position_count
-            FROM job_positions jp
-            JOIN compensation_metrics cm ON jp.id = cm.job_position_id
-            WHERE jp.job_function LIKE '%{function}%'
-              AND (jp.job_area LIKE '%{title2_area}%' OR jp.job_focus LIKE '%{title2_focus}%' OR jp.job_title LIKE '%{title2}%')
-              AND {comp_col} IS NOT NULL
-            GROUP BY jp.job_level
-            ORDER BY avg_comp
-            """
-            
-            df2 = pd.read_sql_query(query2, conn)
-            conn.close()
+                query_params = []
+                for group, (title, role) in enumerate([(title1, roles1[0]), (title2, roles2[0])], 1):
+                    query_params.extend([
+                        group,
+                        f"%{function}%",
+                        f"%{role.get('job_area', '')}%",
+                        f"%{role.get('job_focus', '')}%",
+                        f"%{title}%"
+                    ])
+            
+                df = pd.read_sql_query(query, conn, params=query_params)
+            
+            df1 = df[df['title_group'] == 1].drop(columns='title_group').reset_index(drop=True)
+            df2 = df[df['title_group'] == 2].drop(columns='title_group').reset_index(drop=True)
             
             if df1.empty or df2.empty:
                 return {
@@ -1010,20 +1123,18 @@ class EnhancedAgnoAgent:
             List of similar role names
         """
         try:
-            conn = sqlite3.connect(self.db_path, timeout=10)
+            with self.db_pool.connection() as conn:
+                # Get all unique job areas and focuses in the function
+                query = f"""
+                SELECT DISTINCT job_area, job_focus
+                FROM job_positions 
+                WHERE job_function LIKE '%{function}%'
+                  AND job_area IS NOT NULL
+                  AND job_focus IS NOT NULL
+                LIMIT 20
+                """
             
-            # Get all unique job areas and focuses in the function
-            query = f"""
-            SELECT DISTINCT job_area, job_focus
-            FROM job_positions 
-            WHERE job_function LIKE '%{function}%'
-              AND job_area IS NOT NULL
-              AND job_focus IS NOT NULL
-            LIMIT 20
-            """
-            
-            df = pd.read_sql_query(query, conn)
-            conn.close()
+                df = pd.read_sql_query(query, conn)
             
             if df.empty:
                 return []
@@ -1056,38 +1167,21 @@ class EnhancedAgnoAgent:
             List of matching roles with their details
         """
         try:
-            conn = sqlite3.connect(self.db_path, timeout=10)
+            columns = ROLE_SEARCH_COLUMNS.get(search_in, ROLE_SEARCH_COLUMNS['title'])
+            like_clause = " OR ".join(f"{col} LIKE ?" for col in columns)
+            like_params = [f"%{search_term}%"] * len(columns)
             
-            # Build search query based on search_in parameter
-            if search_in == "all":
-                where_clause = f"""
-                    job_title LIKE '%{search_term}%' OR
-                    job_function LIKE '%{search_term}%' OR
-                    job_area LIKE '%{search_term}%' OR
-                    job_focus LIKE '%{search_term}%'
+            query = f"""
+                SELECT DISTINCT 
+                    job_function, job_area, job_focus, job_category, job_level, job_title
+                FROM job_positions 
+                WHERE {like_clause}
+                ORDER BY job_function, job_area, job_level
+                LIMIT 20
                 """
-            elif search_in == "title":
-                where_clause = f"job_title LIKE '%{search_term}%'"
-            elif search_in == "area":
-                where_clause = f"job_area LIKE '%{search_term}%'"
-            elif search_in == "focus":
-                where_clause = f"job_focus LIKE '%{search_term}%'"
-            elif search_in == "function":
-                where_clause = f"job_function LIKE '%{search_term}%'"
-            else:
-                where_clause = f"job_title LIKE '%{search_term}%'"
             
-            query = f"""
-            SELECT DISTINCT 
-                job_function, job_area, job_focus, job_category, job_level, job_title
-            FROM job_positions 
-            WHERE {where_clause}
-            ORDER BY job_function, job_area, job_level
-            LIMIT 20
-            """
-            
-            df = pd.read_sql_query(query, conn)
-            conn.close()
+            with self.db_pool.connection() as conn:
+                df = pd.read_sql_query(query, conn, params=like_params)
             
             if df.empty:
                 return []
@@ -1104,13 +1198,12 @@ class EnhancedAgnoAgent:
         Handles common variations and partial matches.
         """
         try:
-            conn = sqlite3.connect(self.db_path, timeout=10)
-            cursor = conn.cursor()
+            with self.db_pool.connection() as conn:
+                cursor = conn.cursor()
             
-            # Get all available functions
-            cursor.execute("SELECT DISTINCT job_function FROM job_positions ORDER BY job_function")
-            available_functions = [row[0] for row in cursor.fetchall()]
-            conn.close()
+                # Get all available functions
+                cursor.execute("SELECT DISTINCT job_function FROM job_positions ORDER BY job_function")
+                available_functions = [row[0] for row in cursor.fetchall()]
             
             function_lower = function_name.lower()
             
@@ -1287,8 +1380,8 @@ class EnhancedAgnoAgent:
                 if question.lower() == 'history':
                     print("\n📜 Conversation History:")
                     if self.conversation.history:
-                        for i, item in enumerate(self.conversation.history[-5:], 1):
-                            # Handle Interaction objects (dataclass)
+                        for i, item in enumerate(self.conversation.get_recent_history(5), 1):
+                            # Handle Interaction objects
                             if hasattr(item, 'question'):
                                 print(f"\n{i}. {item.question}")
                                 print(f"   Functions: {item.entities.get('functions', [])}")
@@ -0,0 +1,57 @@
+"""
+Regression checks for EnhancedAgnoAgent._search_job_roles
+"""
+
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from enhanced_agno.connection_pool import ConnectionPool
+from enhanced_agno_agent import EnhancedAgnoAgent
+
+ROWS = [
+    ('Engineering', 'Software', 'Backend', 'Professional', 'Career (P3)', 'Software Engineer'),
+    ('Engineering', 'Software', 'Frontend', 'Professional', 'Advanced (P4)', 'Engineering Lead'),
+    ('Engineering', 'Platform', 'Infrastructure', 'Management', 'Manager (M3)', 'Engineering Manager'),
+    ('Finance', 'Accounting', 'Reporting', 'Professional', 'Career (P3)', 'Senior Accountant'),
+]
+
+
+def _agent(tmp_path):
+    """Agent over a small job_positions table, without index creation or LLM setup"""
+    db_path = str(tmp_path / 'roles.db')
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE job_positions (id INTEGER PRIMARY KEY, job_function TEXT, job_area TEXT, "
+        "job_focus TEXT, job_category TEXT, job_level TEXT, job_title TEXT)"
+    )
+    conn.executemany(
+        "INSERT INTO job_positions (job_function, job_area, job_focus, job_category, job_level, job_title) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        ROWS
+    )
+    conn.commit()
+    conn.close()
+
+    agent = EnhancedAgnoAgent.__new__(EnhancedAgnoAgent)
+    agent.db_pool = ConnectionPool(db_path)
+    return agent
+
+
+def test_whole_word_match_keeps_substring_matches(tmp_path):
+    """"Engineer" must still find "Engineering ..." titles once a whole-word row exists"""
+    agent = _agent(tmp_path)
+
+    titles = {role['job_title'] for role in agent._search_job_roles('Engineer')}
+
+    assert titles == {'Software Engineer', 'Engineering Lead', 'Engineering Manager'}
+
+
+def test_partial_word_and_missing_terms(tmp_path):
+    agent = _agent(tmp_path)
+
+    assert {role['job_title'] for role in agent._search_job_roles('ccount')} == {'Senior Accountant'}
+    assert agent._search_job_roles('Engineering Lead', 'all')[0]['job_title'] == 'Engineering Lead'
+    assert agent._search_job_roles('Designer') == []